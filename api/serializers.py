@@ -0,0 +1,45 @@
+"""
+Представление объектов в JSON.
+
+Поля описаны заранее списками пар (имя, функция), поэтому сериализация
+объекта - это один проход по списку без шаблонов и лишних запросов:
+связанные объекты должны быть выбраны через select_related.
+"""
+from operator import attrgetter
+
+
+def _isoformat(name):
+    get = attrgetter(name)
+    return lambda obj: get(obj).isoformat()
+
+
+POST_FIELDS = (
+    ("id", attrgetter("pk")),
+    ("text", attrgetter("text")),
+    ("pub_date", _isoformat("pub_date")),
+    ("author", attrgetter("author.username")),
+    ("group", lambda post: post.group.slug if post.group_id else None),
+    ("image", lambda post: post.image.url if post.image else None),
+    ("thumbnail", lambda post: post.thumbnail_url or None),
+    ("comments_count", attrgetter("comments_count")),
+)
+
+COMMENT_FIELDS = (
+    ("id", attrgetter("pk")),
+    ("post", attrgetter("post_id")),
+    ("author", attrgetter("author.username")),
+    ("text", attrgetter("text")),
+    ("created", _isoformat("created")),
+)
+
+
+def serialize(obj, fields):
+    return {name: get(obj) for name, get in fields}
+
+
+def serialize_page(page, fields):
+    return {
+        "results": [serialize(obj, fields) for obj in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    }
@@ -0,0 +1,181 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.settings import POSTS_PER_PAGE
+from yatube.testing import QueryBudgetMixin
+
+
+POSTS_URL = reverse("api:posts")
+FEED_URL = reverse("api:feed")
+
+
+class ApiTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        "api:posts": 1,
+        "api:post": 2,
+        "api:comments": 3,
+        "api:feed": 5,
+        "api:not_modified": 0,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f"Запись {number}",
+                                group=cls.group if number % 2 else None)
+            for number in range(POSTS_PER_PAGE + 2)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text="Комментарий")
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def post_json(self, client, url, data):
+        return client.post(url, json.dumps(data),
+                           content_type="application/json")
+
+    def test_posts_feed_by_cursor(self):
+        """Лента отдается страницами по курсору с полями поста."""
+        response = self.assertQueryBudget(
+            "api:posts", lambda: Client().get(POSTS_URL)
+        )
+        data = response.json()
+        self.assertEqual(len(data["results"]), POSTS_PER_PAGE)
+        self.assertEqual(data["results"][0], {
+            "id": self.post.pk,
+            "text": self.post.text,
+            "pub_date": self.post.pub_date.isoformat(),
+            "author": "author",
+            "group": "group",
+            "image": None,
+            "thumbnail": None,
+            "comments_count": 1,
+        })
+        next_page = Client().get(POSTS_URL, {"cursor": data["next"]}).json()
+        self.assertEqual(len(next_page["results"]), 2)
+        self.assertIsNone(next_page["next"])
+
+    def test_posts_feed_filters(self):
+        """Ленту можно ограничить группой или автором."""
+        data = Client().get(POSTS_URL, {"group": "group"}).json()
+        self.assertTrue(all(post["group"] == "group"
+                            for post in data["results"]))
+        self.assertEqual(
+            Client().get(POSTS_URL, {"author": "nobody"}).status_code, 404
+        )
+
+    def test_feed_revalidation_returns_not_modified(self):
+        """Повторный запрос с ETag получает 304, пока лента не изменится."""
+        response = Client().get(POSTS_URL)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+        response = self.assertQueryBudget(
+            "api:not_modified",
+            lambda: Client().get(POSTS_URL, HTTP_IF_NONE_MATCH=etag),
+        )
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text="Новая запись")
+        response = Client().get(POSTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_post_detail_last_modified(self):
+        """Пост отдается с Last-Modified, комментарий меняет его."""
+        url = reverse("api:post", args=[self.post.pk])
+        response = self.assertQueryBudget("api:post",
+                                          lambda: Client().get(url))
+        self.assertEqual(response.json()["id"], self.post.pk)
+        modified = response["Last-Modified"]
+        response = Client().get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text="Ответ")
+        response = Client().get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["comments_count"], 2)
+        self.assertEqual(
+            Client().get(reverse("api:post", args=[0])).json(),
+            {"detail": "Не найдено"},
+        )
+
+    def test_comments(self):
+        """Комментарии читают все, а пишут только вошедшие."""
+        url = reverse("api:comments", args=[self.post.pk])
+        response = self.assertQueryBudget("api:comments",
+                                          lambda: Client().get(url))
+        self.assertEqual(
+            [comment["text"] for comment in response.json()["results"]],
+            ["Комментарий"],
+        )
+        response = self.post_json(Client(), url, {"text": "Аноним"})
+        self.assertEqual(response.status_code, 401)
+        response = self.post_json(self.reader_client, url, {"text": ""})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("text", response.json()["errors"])
+        response = self.post_json(self.reader_client, url, {"text": "Еще"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["author"], "reader")
+        self.assertTrue(
+            Comment.objects.filter(post=self.post, text="Еще").exists()
+        )
+
+    def test_create_post(self):
+        """Пост создается из JSON, ответ содержит его адрес."""
+        response = self.post_json(self.reader_client, POSTS_URL,
+                                  {"text": "Из API", "group": self.group.pk})
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(text="Из API")
+        self.assertEqual(post.author, self.reader)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(response["Location"],
+                         reverse("api:post", args=[post.pk]))
+        response = self.reader_client.post(
+            POSTS_URL, "[]", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_follow_and_feed(self):
+        """Подписка через API добавляет посты автора в ленту подписок."""
+        url = reverse("api:follow", args=["author"])
+        self.assertEqual(self.reader_client.post(url).status_code, 201)
+        self.assertEqual(self.reader_client.post(url).status_code, 200)
+        response = self.assertQueryBudget(
+            "api:feed", lambda: self.reader_client.get(FEED_URL)
+        )
+        self.assertEqual(response.json()["results"][0]["id"], self.post.pk)
+        etag = response["ETag"]
+        response = self.reader_client.delete(url)
+        self.assertEqual(response.json(), {"author": "author",
+                                           "following": False})
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+        response = self.reader_client.get(FEED_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_errors(self):
+        """Ошибки возвращаются в JSON с подходящим кодом."""
+        self.assertEqual(Client().get(FEED_URL).status_code, 401)
+        own = reverse("api:follow", args=["reader"])
+        self.assertEqual(self.reader_client.post(own).status_code, 400)
+        response = Client().put(POSTS_URL)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Allow"], "GET, HEAD, POST")
+        response = Client().get(
+            reverse("api:post", args=[self.post.pk]),
+            HTTP_IF_MODIFIED_SINCE=http_date(
+                self.post.modified.timestamp() - 60
+            ),
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,25 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = "api"
+
+
+urlpatterns = [
+    path("posts/",
+         views.post_list,
+         name="posts"),
+    path("posts/<int:post_id>/",
+         views.post_detail,
+         name="post"),
+    path("posts/<int:post_id>/comments/",
+         views.comment_list,
+         name="comments"),
+    path("feed/",
+         views.follow_feed,
+         name="feed"),
+    path("users/<str:username>/follow/",
+         views.follow,
+         name="follow"),
+]
@@ -0,0 +1,230 @@
+"""
+JSON API версии 1.
+
+Представления используют те же выборки и постраничную навигацию по
+курсору, что и HTML-страницы. GET-ответы снабжаются ETag (и, где есть
+дата изменения, Last-Modified), которые вычисляются без выборки самих
+данных: по счетчикам поколений кэша лент или по Post.modified. Клиент,
+опрашивающий API с If-None-Match/If-Modified-Since, получает 304.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from posts.cache import ALL_SCOPE, get_generations
+from posts.forms import CommentForm, PostForm
+from posts.models import Follow, Group, Post, User
+from posts.paginator import CursorPaginator
+from posts.settings import POSTS_PER_PAGE
+from posts.timeline import get_timeline_page
+from posts.views import get_comments_paginator
+
+from .serializers import (COMMENT_FIELDS, POST_FIELDS, serialize,
+                          serialize_page)
+
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(status, detail, **extra):
+    return JsonResponse({"detail": detail, **extra}, status=status)
+
+
+def api_view(methods, login_required=False):
+    """
+    Ограничивает методы, требует входа для изменяющих запросов
+    (или для всех при login_required) и отвечает на ошибки JSON.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            allowed = set(methods) | ({"HEAD"} if "GET" in methods else set())
+            if request.method not in allowed:
+                response = error(405, "Метод не поддерживается")
+                response["Allow"] = ", ".join(sorted(allowed))
+                return response
+            if ((login_required or request.method not in SAFE_METHODS)
+                    and not request.user.is_authenticated):
+                return error(401, "Требуется вход")
+            try:
+                response = view(request, *args, **kwargs)
+            except Http404:
+                return error(404, "Не найдено")
+            except BadRequest as exception:
+                return error(400, str(exception))
+            if request.method in SAFE_METHODS:
+                # Ответ можно хранить, но перед использованием
+                # нужно проверить по ETag.
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def invalid(form):
+    return error(400, "Некорректные данные",
+                 errors=form.errors.get_json_data())
+
+
+def read_data(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            raise BadRequest("Некорректный JSON")
+        if not isinstance(data, dict):
+            raise BadRequest("Ожидается JSON-объект")
+        return data
+    return request.POST
+
+
+def _etag(*parts):
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _feed_scopes(request):
+    scopes = [ALL_SCOPE, "index"]
+    if request.GET.get("group"):
+        scopes.append(f"group:{request.GET['group']}")
+    if request.GET.get("author"):
+        scopes.append(f"profile:{request.GET['author']}")
+    return scopes
+
+
+def posts_etag(request):
+    if request.method not in SAFE_METHODS:
+        return None
+    return _etag(get_generations(_feed_scopes(request)),
+                 request.GET.urlencode())
+
+
+@api_view(("GET", "POST"))
+@condition(etag_func=posts_etag)
+def post_list(request):
+    if request.method == "POST":
+        return create_post(request)
+    queryset = Post.objects.select_related("author", "group")
+    if request.GET.get("group"):
+        group = get_object_or_404(Group, slug=request.GET["group"])
+        queryset = queryset.filter(group=group)
+    if request.GET.get("author"):
+        author = get_object_or_404(User, username=request.GET["author"])
+        queryset = queryset.filter(author=author)
+    page = CursorPaginator(queryset, POSTS_PER_PAGE).get_page(
+        request.GET.get("cursor")
+    )
+    return JsonResponse(serialize_page(page, POST_FIELDS))
+
+
+def create_post(request):
+    form = PostForm(read_data(request), files=request.FILES or None)
+    if not form.is_valid():
+        return invalid(form)
+    post = form.save(commit=False)
+    post.author = request.user
+    with transaction.atomic():
+        post.save()
+    response = JsonResponse(serialize(post, POST_FIELDS), status=201)
+    response["Location"] = reverse("api:post", args=[post.pk])
+    return response
+
+
+def feed_etag(request):
+    timeline = request.user.timeline.aggregate(
+        latest=Max("pub_date"), count=Count("pk")
+    )
+    return _etag(
+        get_generations([ALL_SCOPE, "index",
+                         f"profile:{request.user.username}"]),
+        timeline,
+        request.GET.get("cursor"),
+    )
+
+
+@api_view(("GET",), login_required=True)
+@condition(etag_func=feed_etag)
+def follow_feed(request):
+    page = get_timeline_page(request.user, request.GET.get("cursor"))
+    return JsonResponse(serialize_page(page, POST_FIELDS))
+
+
+def _post_modified(request, post_id):
+    # ETag и Last-Modified считаются по одной выборке даты изменения.
+    if not hasattr(request, "_api_post_modified"):
+        request._api_post_modified = Post.objects.filter(
+            pk=post_id
+        ).values_list("modified", flat=True).first()
+    return request._api_post_modified
+
+
+def post_etag(request, post_id):
+    if request.method not in SAFE_METHODS:
+        return None
+    modified = _post_modified(request, post_id)
+    if modified is None:
+        return None
+    return _etag(post_id, modified, request.GET.get("cursor"))
+
+
+def post_last_modified(request, post_id):
+    if request.method not in SAFE_METHODS:
+        return None
+    return _post_modified(request, post_id)
+
+
+@api_view(("GET",))
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related("author", "group"), pk=post_id
+    )
+    return JsonResponse(serialize(post, POST_FIELDS))
+
+
+@api_view(("GET", "POST"))
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def comment_list(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    if request.method == "POST":
+        return create_comment(request, post)
+    page = get_comments_paginator(post).get_page(request.GET.get("cursor"))
+    return JsonResponse(serialize_page(page, COMMENT_FIELDS))
+
+
+def create_comment(request, post):
+    form = CommentForm(read_data(request))
+    if not form.is_valid():
+        return invalid(form)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    with transaction.atomic():
+        comment.save()
+    return JsonResponse(serialize(comment, COMMENT_FIELDS), status=201)
+
+
+@api_view(("POST", "DELETE"))
+def follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.method == "DELETE":
+        Follow.objects.filter(user=request.user, author=author).delete()
+        return JsonResponse({"author": username, "following": False})
+    if author == request.user:
+        return error(400, "Нельзя подписаться на себя")
+    _, created = Follow.objects.get_or_create(user=request.user,
+                                              author=author)
+    return JsonResponse({"author": username, "following": True},
+                        status=201 if created else 200)
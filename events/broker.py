@@ -0,0 +1,220 @@
+"""
+Брокер событий для живого обновления страниц.
+
+События (новый пост, новый комментарий) публикуются в каналы
+("index", "group:<slug>", "author:<username>", "post:<id>") и попадают
+в кольцевой буфер последних EVENTS_BUFFER_SIZE событий с возрастающими
+номерами. Подписчик помнит номер последнего просмотренного события
+и ждет следующих. Очередей на каждого подписчика нет, поэтому память не
+растет с их числом, а медленный клиент не задерживает публикацию: если
+он отстал больше чем на буфер, он получает признак сброса и предлагает
+перезагрузить страницу. Число одновременных подключений ограничено
+всего (EVENTS_MAX_CONNECTIONS) и на клиента
+(EVENTS_MAX_CLIENT_CONNECTIONS).
+
+LocalBroker передает события только внутри процесса. CacheBroker
+публикует их в общий кэш, а каждый процесс раз в EVENTS_POLL_INTERVAL
+секунд забирает новые события одним запросом к кэшу. Номер события
+выдается раньше, чем само событие записывается в кэш, поэтому процесс
+не пропускает недостающий номер сразу, а ждет его до
+EVENTS_PUBLISH_GRACE секунд.
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple("Event", "id channels type data")
+
+
+class TooManyConnections(Exception):
+    pass
+
+
+class LocalBroker:
+    def __init__(self, buffer_size=None, max_connections=None,
+                 max_client_connections=None):
+        self._events = deque(maxlen=buffer_size or settings.EVENTS_BUFFER_SIZE)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self.max_connections = (max_connections
+                                or settings.EVENTS_MAX_CONNECTIONS)
+        self.max_client_connections = (
+            max_client_connections or settings.EVENTS_MAX_CLIENT_CONNECTIONS
+        )
+        self._connections = Counter()
+
+    @property
+    def last_id(self):
+        with self._condition:
+            return self._last_id
+
+    def publish(self, channels, type, data):
+        with self._condition:
+            self._append([Event(self._last_id + 1, tuple(channels),
+                                type, data)])
+
+    def _append(self, events):
+        # Вызывается под self._condition.
+        self._events.extend(events)
+        self._last_id = max(self._last_id, events[-1].id)
+        self._condition.notify_all()
+
+    def _since(self, channels, last_id):
+        if last_id > self._last_id or (
+                self._events and last_id < self._events[0].id - 1):
+            return None
+        events = []
+        for event in reversed(self._events):
+            if event.id <= last_id:
+                break
+            if channels.intersection(event.channels):
+                events.append(event)
+        events.reverse()
+        return events
+
+    def wait(self, channels, last_id, timeout):
+        """
+        Ждет событий каналов с номером больше last_id не дольше timeout
+        секунд. Возвращает (события, номер последнего просмотренного
+        события); вместо списка событий None, если часть их уже вытеснена
+        из буфера.
+        """
+        channels = set(channels)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events = self._since(channels, last_id)
+                if events is None or events:
+                    return events, self._last_id
+                # События других каналов просмотрены: отставание
+                # считается от последнего номера.
+                last_id = self._last_id
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return events, last_id
+                self._condition.wait(remaining)
+
+    def connect(self, client):
+        """
+        Учитывает подключение клиента или бросает TooManyConnections.
+        """
+        with self._condition:
+            if (sum(self._connections.values()) >= self.max_connections
+                    or self._connections[client]
+                    >= self.max_client_connections):
+                raise TooManyConnections
+            self._connections[client] += 1
+
+    def disconnect(self, client):
+        with self._condition:
+            self._connections[client] -= 1
+            if self._connections[client] <= 0:
+                del self._connections[client]
+
+
+class CacheBroker(LocalBroker):
+    LAST_ID_KEY = "events:last-id"
+    EVENT_KEY = "events:{}"
+
+    def __init__(self, *args, alias=None, poll_interval=None,
+                 publish_grace=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = caches[alias or settings.EVENTS_CACHE]
+        self.poll_interval = poll_interval or settings.EVENTS_POLL_INTERVAL
+        self.publish_grace = (settings.EVENTS_PUBLISH_GRACE
+                              if publish_grace is None else publish_grace)
+        # Номер недостающего события -> когда его заметили.
+        self._missing = {}
+        self._pump_lock = threading.Lock()
+        self._pump_thread = None
+
+    def publish(self, channels, type, data):
+        self.cache.add(self.LAST_ID_KEY, 0, None)
+        event_id = self.cache.incr(self.LAST_ID_KEY)
+        self.cache.set(self.EVENT_KEY.format(event_id),
+                       (tuple(channels), type, data),
+                       settings.EVENTS_CACHE_TIME)
+        self.pump()
+
+    def pump(self):
+        """
+        Переносит в буфер события, опубликованные всеми процессами.
+        """
+        with self._pump_lock:
+            last_id = self.cache.get(self.LAST_ID_KEY) or 0
+            if last_id < self.last_id:
+                # Счетчик вытеснен из кэша: нумерация началась заново,
+                # подписчики получат сброс.
+                with self._condition:
+                    self._events.clear()
+                    self._last_id = last_id
+                    self._condition.notify_all()
+            first_id = max(self.last_id, last_id - self._events.maxlen) + 1
+            if last_id < first_id:
+                return
+            ids = range(first_id, last_id + 1)
+            found = self.cache.get_many(
+                [self.EVENT_KEY.format(event_id) for event_id in ids]
+            )
+            now = time.monotonic()
+            events = []
+            # Номер, до которого события получены без пропусков.
+            reached = first_id - 1
+            for event_id in ids:
+                key = self.EVENT_KEY.format(event_id)
+                if key in found:
+                    events.append(Event(event_id, *found[key]))
+                elif now - self._missing.setdefault(
+                    event_id, now
+                ) < self.publish_grace:
+                    # Событие еще записывается: ждем его.
+                    break
+                reached = event_id
+            self._missing = {
+                event_id: since for event_id, since in self._missing.items()
+                if event_id > reached
+            }
+            with self._condition:
+                if events:
+                    self._append(events)
+                self._last_id = reached
+
+    def connect(self, client):
+        super().connect(client)
+        if self._pump_thread is None:
+            with self._pump_lock:
+                if self._pump_thread is None:
+                    self._pump_thread = threading.Thread(
+                        target=self._run_pump, name="events-pump",
+                        daemon=True,
+                    )
+                    self._pump_thread.start()
+
+    def _run_pump(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.pump()
+            except Exception:
+                logger.exception("Не удалось получить события из кэша")
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
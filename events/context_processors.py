@@ -0,0 +1,10 @@
+from .views import streams_allowed
+
+
+def live_updates(request):
+    """
+    Сообщает шаблонам, можно ли слушать поток событий.
+    """
+    return {
+        'live_updates_stream': streams_allowed(request)
+    }
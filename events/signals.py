@@ -0,0 +1,52 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Post
+
+from .broker import get_broker
+
+
+def post_channels(post):
+    channels = ["index", f"author:{post.author.username}"]
+    if post.group_id is not None:
+        channels.append(f"group:{post.group.slug}")
+    return channels
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, raw, **kwargs):
+    """
+    Сообщает подписчикам о новом посте после фиксации транзакции,
+    чтобы по событию страница уже могла его показать.
+    """
+    if not created or raw:
+        return
+    transaction.on_commit(partial(
+        get_broker().publish,
+        post_channels(instance),
+        "post",
+        {
+            "id": instance.pk,
+            "author": instance.author.username,
+            "group": instance.group.slug if instance.group_id else None,
+        },
+    ))
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, raw, **kwargs):
+    if not created or raw:
+        return
+    transaction.on_commit(partial(
+        get_broker().publish,
+        [f"post:{instance.post_id}"],
+        "comment",
+        {
+            "id": instance.pk,
+            "post": instance.post_id,
+            "author": instance.author.username,
+        },
+    ))
@@ -0,0 +1,94 @@
+// Показывает баннер о новых записях и комментариях.
+// Если сервер держит потоки (data-stream), слушает поток SSE, а если он
+// недоступен (нет EventSource, сервер отказал или прокси рвет
+// соединение) - опрашивает тот же адрес. Паузу между опросами задает
+// сервер (poll_interval): под WSGI опрос короткий и редкий.
+(function () {
+  "use strict";
+
+  var RETRY_DELAY = 5000;
+  var banner = document.getElementById("live-updates");
+  if (!banner) {
+    return;
+  }
+  var url = banner.getAttribute("data-url");
+  var counter = banner.querySelector(".live-count");
+  var seen = {};
+  var count = 0;
+  var lastId = null;
+
+  function notify(type, data) {
+    var key = type + ":" + data.id;
+    if (seen[key]) {
+      return;
+    }
+    seen[key] = true;
+    count += 1;
+    counter.textContent = count;
+    banner.hidden = false;
+  }
+
+  function outdated() {
+    // Часть событий пропущена: точное число неизвестно.
+    counter.textContent = count ? count + "+" : "есть";
+    banner.hidden = false;
+  }
+
+  function poll(delay) {
+    window.setTimeout(function () {
+      var address = url + (lastId === null ? "" : "?last_id=" + lastId);
+      fetch(address, {
+        credentials: "same-origin",
+        headers: {"Accept": "application/json"}
+      }).then(function (response) {
+        if (response.status === 503) {
+          var retry = parseInt(response.headers.get("Retry-After"), 10);
+          poll(retry ? retry * 1000 : RETRY_DELAY);
+          return;
+        }
+        if (!response.ok) {
+          throw new Error(response.statusText);
+        }
+        return response.json().then(function (result) {
+          result.events.forEach(function (event) {
+            notify(event.type, event.data);
+          });
+          lastId = result.last_id;
+          if (result.reset) {
+            outdated();
+            return;
+          }
+          poll(result.poll_interval * 1000);
+        });
+      }).catch(function () {
+        poll(RETRY_DELAY);
+      });
+    }, delay);
+  }
+
+  function listen() {
+    var source = new EventSource(url);
+    ["post", "comment"].forEach(function (type) {
+      source.addEventListener(type, function (message) {
+        lastId = message.lastEventId;
+        notify(type, JSON.parse(message.data));
+      });
+    });
+    source.addEventListener("reset", function () {
+      source.close();
+      outdated();
+    });
+    source.onerror = function () {
+      // Обрыв браузер восстановит сам; закрытый поток означает отказ.
+      if (source.readyState === EventSource.CLOSED) {
+        poll(RETRY_DELAY);
+      }
+    };
+  }
+
+  if (window.EventSource && banner.hasAttribute("data-stream")) {
+    listen();
+  } else {
+    poll(0);
+  }
+})();
@@ -0,0 +1,99 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from events.broker import CacheBroker, LocalBroker, TooManyConnections
+
+
+class LocalBrokerTests(SimpleTestCase):
+    def setUp(self):
+        self.broker = LocalBroker(buffer_size=3, max_connections=2,
+                                  max_client_connections=1)
+
+    def test_wait_returns_events_of_channels(self):
+        """Подписчик получает только события своих каналов."""
+        self.broker.publish(["index", "group:cats"], "post", {"id": 1})
+        self.broker.publish(["index"], "post", {"id": 2})
+        events, last_id = self.broker.wait(["group:cats"], 0, 0)
+        self.assertEqual([event.data for event in events], [{"id": 1}])
+        self.assertEqual(last_id, 2)
+        events, last_id = self.broker.wait(["group:cats"], last_id, 0)
+        self.assertEqual((events, last_id), ([], 2))
+
+    def test_wait_wakes_up_on_publish(self):
+        """Ожидание завершается, как только опубликовано событие."""
+        timer = threading.Timer(
+            0.05, self.broker.publish, (["post:1"], "comment", {"id": 3})
+        )
+        timer.start()
+        events, last_id = self.broker.wait(["post:1"], 0, 5)
+        timer.join()
+        self.assertEqual([event.id for event in events], [1])
+        self.assertEqual(last_id, 1)
+
+    def test_lagging_subscriber_is_reset(self):
+        """Отставший больше чем на буфер подписчик получает сброс."""
+        for number in range(5):
+            self.broker.publish(["index"], "post", {"id": number})
+        self.assertEqual(self.broker.wait(["index"], 1, 0), (None, 5))
+        self.assertEqual(len(self.broker.wait(["index"], 2, 0)[0]), 3)
+        # Номер из будущего (например, после перезапуска процесса).
+        self.assertIsNone(self.broker.wait(["index"], 10, 0)[0])
+
+    def test_connection_limits(self):
+        """Подключения ограничены всего и на одного клиента."""
+        self.broker.connect("user:1")
+        with self.assertRaises(TooManyConnections):
+            self.broker.connect("user:1")
+        self.broker.connect("user:2")
+        with self.assertRaises(TooManyConnections):
+            self.broker.connect("user:3")
+        self.broker.disconnect("user:1")
+        self.broker.connect("user:3")
+
+
+class CacheBrokerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_events_pass_between_brokers(self):
+        """События одного процесса доходят до подписчиков другого."""
+        publisher = CacheBroker(alias="default")
+        subscriber = CacheBroker(alias="default")
+        publisher.publish(["index"], "post", {"id": 1})
+        subscriber.pump()
+        events, last_id = subscriber.wait(["index"], 0, 0)
+        self.assertEqual([event.data for event in events], [{"id": 1}])
+        self.assertEqual(last_id, publisher.last_id)
+
+    def test_event_written_late_is_not_lost(self):
+        """Событие, записанное в кэш после выдачи номера, доходит
+        до подписчика, успевшего увидеть номер раньше."""
+        publisher = CacheBroker(alias="default")
+        subscriber = CacheBroker(alias="default")
+        set_event = cache.set
+
+        def delayed_set(*args, **kwargs):
+            subscriber.pump()
+            set_event(*args, **kwargs)
+
+        with mock.patch.object(cache, "set", side_effect=delayed_set):
+            publisher.publish(["index"], "post", {"id": 1})
+        self.assertEqual(subscriber.last_id, 0)
+        subscriber.pump()
+        events, last_id = subscriber.wait(["index"], 0, 0)
+        self.assertEqual([event.data for event in events], [{"id": 1}])
+        self.assertEqual(last_id, 1)
+
+    def test_missing_event_is_skipped_after_grace(self):
+        """Не записанное событие пропускается по истечении ожидания."""
+        subscriber = CacheBroker(alias="default", publish_grace=0)
+        cache.add(CacheBroker.LAST_ID_KEY, 0, None)
+        cache.incr(CacheBroker.LAST_ID_KEY)
+        CacheBroker(alias="default").publish(["index"], "post", {"id": 2})
+        subscriber.pump()
+        self.assertEqual(subscriber.last_id, 2)
+        events, _ = subscriber.wait(["index"], 1, 0)
+        self.assertEqual([event.data for event in events], [{"id": 2}])
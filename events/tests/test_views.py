@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from events.broker import LocalBroker
+from posts.models import Comment, Follow, Group, Post, User
+
+
+INDEX_EVENTS_URL = reverse("events:index")
+# Окружение запроса, пришедшего через yatube.asgi.
+ASGI = {"yatube.asgi": True}
+
+
+@override_settings(EVENTS_STREAM_TIMEOUT=0.1, EVENTS_LONG_POLL_TIMEOUT=0.1,
+                   EVENTS_MAX_CONNECTIONS=2, EVENTS_MAX_CLIENT_CONNECTIONS=1)
+class EventViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.broker = LocalBroker()
+        patcher = mock.patch("events.views.get_broker",
+                             return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stream_sends_events(self):
+        """Поток SSE продолжает с Last-Event-ID и освобождает подключение."""
+        self.broker.publish(["index"], "post", {"id": 1})
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(INDEX_EVENTS_URL,
+                              HTTP_ACCEPT="text/event-stream",
+                              HTTP_LAST_EVENT_ID="0", **ASGI)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = b"".join(response.streaming_content).decode()
+        response.close()
+        self.assertIn('id: 1\nevent: post\ndata: {"id": 1}\n\n', content)
+        self.broker.connect(f"user:{self.reader.pk}")
+
+    def test_long_poll(self):
+        """Долгий опрос возвращает события после указанного номера."""
+        response = Client().get(INDEX_EVENTS_URL, **ASGI)
+        self.assertEqual(response.json(), {"events": [], "last_id": 0,
+                                           "reset": False,
+                                           "poll_interval": 0})
+        self.broker.publish(["index"], "post", {"id": 1})
+        response = Client().get(INDEX_EVENTS_URL, {"last_id": 0}, **ASGI)
+        self.assertEqual(response.json()["events"],
+                         [{"id": 1, "type": "post", "data": {"id": 1}}])
+
+    @override_settings(EVENTS_LONG_POLL_TIMEOUT=5)
+    def test_wsgi_clients_poll_without_waiting(self):
+        """Под WSGI поток не открывается и ответ не ждет событий."""
+        response = Client().get(INDEX_EVENTS_URL, {"last_id": 0},
+                                HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json(), {"events": [], "last_id": 0,
+                                           "reset": False,
+                                           "poll_interval": 30})
+
+    def test_follow_stream_listens_to_followed_authors(self):
+        """Лента подписок слушает авторов, на которых подписан читатель."""
+        url = reverse("events:follow")
+        self.assertEqual(Client().get(url).status_code, 401)
+        client = Client()
+        client.force_login(self.reader)
+        self.broker.publish(["author:author"], "post", {"id": 1})
+        self.broker.publish(["author:reader"], "post", {"id": 2})
+        events = client.get(url, {"last_id": 0}).json()["events"]
+        self.assertEqual([event["data"] for event in events], [{"id": 1}])
+
+    def test_connection_limit(self):
+        """Сверх лимита подключений клиент получает 503 с Retry-After."""
+        client = Client()
+        client.force_login(self.reader)
+        self.broker.connect(f"user:{self.reader.pk}")
+        response = client.get(INDEX_EVENTS_URL)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+    def test_guests_are_limited_by_session(self):
+        """Гостей с одного адреса различает сессия."""
+        guest = Client()
+        self.assertEqual(guest.get(INDEX_EVENTS_URL).status_code, 200)
+        self.broker.connect(f"session:{guest.session.session_key}")
+        self.assertEqual(guest.get(INDEX_EVENTS_URL).status_code, 503)
+        self.assertEqual(Client().get(INDEX_EVENTS_URL).status_code, 200)
+
+    def test_pages_subscribe_to_events(self):
+        """Страницы лент и поста подписываются на свои события."""
+        group = Group.objects.create(title="Группа", slug="group")
+        post = Post.objects.create(author=self.author, text="Запись")
+        client = Client()
+        client.force_login(self.reader)
+        pages = {
+            reverse("index"): INDEX_EVENTS_URL,
+            reverse("follow_index"): reverse("events:follow"),
+            reverse("group_posts", args=["group"]):
+                reverse("events:group", args=[group.slug]),
+            reverse("post", args=["author", post.pk]):
+                reverse("events:post", args=[post.pk]),
+        }
+        for page, url in pages.items():
+            with self.subTest(page=page):
+                self.assertContains(client.get(page), f'data-url="{url}"')
+
+    def test_streams_are_offered_under_asgi_only(self):
+        """Слушать поток страница предлагает только под ASGI."""
+        post = Post.objects.create(author=self.author, text="Запись")
+        page = reverse("post", args=["author", post.pk])
+        self.assertNotContains(Client().get(page), "data-stream")
+        self.assertContains(Client().get(page, **ASGI), "data-stream")
+
+
+class PublishTests(TransactionTestCase):
+    def setUp(self):
+        self.broker = LocalBroker()
+        patcher = mock.patch("events.signals.get_broker",
+                             return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_new_post_and_comment_are_published(self):
+        """Новые посты и комментарии публикуются в свои каналы."""
+        author = User.objects.create_user(username="author")
+        group = Group.objects.create(title="Группа", slug="group")
+        post = Post.objects.create(author=author, text="Запись", group=group)
+        Comment.objects.create(post=post, author=author, text="Комментарий")
+        events, _ = self.broker.wait(
+            ["index", "author:author", "group:group", f"post:{post.pk}"],
+            0, 0,
+        )
+        self.assertEqual(
+            [(event.channels, event.type) for event in events],
+            [(("index", "author:author", "group:group"), "post"),
+             ((f"post:{post.pk}",), "comment")],
+        )
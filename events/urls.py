@@ -0,0 +1,22 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = "events"
+
+
+urlpatterns = [
+    path("",
+         views.index,
+         name="index"),
+    path("follow/",
+         views.follow,
+         name="follow"),
+    path("group/<slug:slug>/",
+         views.group,
+         name="group"),
+    path("post/<int:post_id>/",
+         views.post,
+         name="post"),
+]
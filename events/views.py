@@ -0,0 +1,167 @@
+"""
+Подписка страниц на новые посты и комментарии.
+
+Под ASGI (yatube.asgi) браузер с EventSource получает поток
+Server-Sent Events (Accept: text/event-stream), остальные клиенты -
+долгий опрос: ответ JSON приходит, как только появится событие, или
+через EVENTS_LONG_POLL_TIMEOUT секунд. Поток закрывается через
+EVENTS_STREAM_TIMEOUT секунд, браузер переподключается и продолжает
+с Last-Event-ID. Если подключений слишком много, клиент получает 503
+с Retry-After.
+
+Под WSGI каждое ожидающее подключение занимало бы рабочий поток,
+поэтому там ответ JSON возвращается сразу, а страница опрашивает адрес
+раз в EVENTS_SHORT_POLL_INTERVAL секунд.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from posts.models import Follow
+
+from .broker import TooManyConnections, get_broker
+
+
+def streams_allowed(request):
+    """
+    Можно ли держать подключение открытым: только под ASGIHandler,
+    где ожидание не занимает рабочий поток WSGI-сервера.
+    """
+    return request.META.get("yatube.asgi", False)
+
+
+def get_client(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if request.session.session_key is None:
+        # Пустая сессия не сохраняется, а гостю нужен постоянный ключ.
+        request.session["live_updates"] = True
+        request.session.save()
+    return f"session:{request.session.session_key}"
+
+
+def get_last_id(request, broker):
+    value = request.META.get("HTTP_LAST_EVENT_ID",
+                             request.GET.get("last_id"))
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return broker.last_id
+
+
+def format_event(event):
+    return (f"id: {event.id}\n"
+            f"event: {event.type}\n"
+            f"data: {json.dumps(event.data)}\n\n")
+
+
+class EventStream:
+    """
+    Тело ответа SSE. При закрытии ответа освобождает подключение.
+    """
+
+    def __init__(self, broker, client, channels, last_id):
+        self.broker = broker
+        self.client = client
+        self.channels = channels
+        self.last_id = last_id
+        self.closed = False
+
+    def __iter__(self):
+        yield f"retry: {settings.EVENTS_RETRY * 1000}\n\n"
+        deadline = time.monotonic() + settings.EVENTS_STREAM_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events, self.last_id = self.broker.wait(
+                self.channels, self.last_id,
+                min(settings.EVENTS_HEARTBEAT, remaining),
+            )
+            if events is None:
+                yield "event: reset\ndata: {}\n\n"
+                return
+            for event in events:
+                yield format_event(event)
+            if not events:
+                # Проверка соединения; id сдвигает Last-Event-ID
+                # за события других каналов.
+                yield f": ping\nid: {self.last_id}\n\n"
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.disconnect(self.client)
+
+
+def subscribe(request, channels):
+    broker = get_broker()
+    client = get_client(request)
+    try:
+        broker.connect(client)
+    except TooManyConnections:
+        response = HttpResponse("Слишком много подключений", status=503,
+                                content_type="text/plain; charset=utf-8")
+        response["Retry-After"] = settings.EVENTS_RETRY
+        return response
+    last_id = get_last_id(request, broker)
+    streams = streams_allowed(request)
+    accept = request.META.get("HTTP_ACCEPT", "")
+    if streams and "text/event-stream" in accept:
+        response = StreamingHttpResponse(
+            EventStream(broker, client, channels, last_id),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Прокси не должен накапливать поток в буфере.
+        response["X-Accel-Buffering"] = "no"
+        return response
+    try:
+        events, last_id = broker.wait(
+            channels, last_id,
+            settings.EVENTS_LONG_POLL_TIMEOUT
+            if streams and "last_id" in request.GET else 0,
+        )
+    finally:
+        broker.disconnect(client)
+    response = JsonResponse({
+        "events": [
+            {"id": event.id, "type": event.type, "data": event.data}
+            for event in events or ()
+        ],
+        "last_id": last_id,
+        "reset": events is None,
+        # Через сколько секунд спрашивать снова.
+        "poll_interval": (0 if streams
+                          else settings.EVENTS_SHORT_POLL_INTERVAL),
+    })
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+@require_safe
+def index(request):
+    return subscribe(request, ["index"])
+
+
+@require_safe
+def follow(request):
+    if not request.user.is_authenticated:
+        return HttpResponse(status=401)
+    authors = Follow.objects.filter(user=request.user).values_list(
+        "author__username", flat=True
+    )
+    return subscribe(request, [f"author:{author}" for author in authors])
+
+
+@require_safe
+def group(request, slug):
+    return subscribe(request, [f"group:{slug}"])
+
+
+@require_safe
+def post(request, post_id):
+    return subscribe(request, [f"post:{post_id}"])
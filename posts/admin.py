@@ -1,14 +1,45 @@
 from django.contrib import admin
+from django.db import connection
 
 from .models import Comment, Follow, Post, Group
+from .paginator import EstimatedCountPaginator
+from .search import SearchResults
+from .settings import ADMIN_COUNT_LIMIT, ADMIN_SEARCH_LIMIT
 
 
-class PostAdmin(admin.ModelAdmin):
+class AdminPaginator(EstimatedCountPaginator):
+    count_limit = ADMIN_COUNT_LIMIT
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Список без COUNT(*) по всей таблице: число строк ограничено
+    ADMIN_COUNT_LIMIT, а общее число записей не запрашивается.
+    """
+    paginator = AdminPaginator
+    show_full_result_count = False
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = ("pk", "text", "pub_date", "author", "group")
+    list_select_related = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
+    date_hierarchy = "pub_date"
+    raw_id_fields = ("author",)
+    autocomplete_fields = ("group",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идет через поисковый индекс, а не LIKE.
+        if not search_term:
+            return queryset, False
+        # id передаются параметрами запроса, а их число ограничено БД.
+        limit = min(ADMIN_SEARCH_LIMIT,
+                    connection.features.max_query_params or ADMIN_SEARCH_LIMIT)
+        post_ids = SearchResults(search_term).post_ids(0, limit)
+        return queryset.filter(pk__in=post_ids), False
+
 
 admin.site.register(Post, PostAdmin)
 
@@ -23,16 +54,23 @@ class GroupAdmin(admin.ModelAdmin):
 admin.site.register(Group, GroupAdmin)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ("pk", "post", "author", "text", "created")
-    search_fields = ("text",)
+    list_select_related = ("post", "author")
+    # Поиск по тексту комментариев просматривал бы всю таблицу,
+    # поэтому ищем по точному имени автора (уникальный индекс).
+    search_fields = ("=author__username",)
+    date_hierarchy = "created"
+    raw_id_fields = ("post", "author")
 
 
 admin.site.register(Comment, CommentAdmin)
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ("pk", "user", "author")
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
 
 
 admin.site.register(Follow, FollowAdmin)
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from yatube import sqlite
+
+        from . import loaders, signals  # noqa: F401
+
+        sqlite.connect()
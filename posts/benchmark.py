@@ -0,0 +1,507 @@
+"""
+Нагрузочные замеры представлений постов.
+
+generate() наполняет БД пользователями, группами, постами,
+комментариями и подписками заданного объема (bulk_create пачками,
+затем пересчет денормализованных данных). run() прогоняет сценарии
+через тестовый клиент Django (полный WSGI-стек с middleware) и
+возвращает задержки p50/p95/p99, число запросов к БД на запрос
+и запросы в секунду; run_writes() замеряет пропускную способность
+записи при нескольких одновременных писателях; run_slow_clients()
+сравнивает обслуживание медленных клиентов потоками WSGI и через
+ASGI-адаптер; compare() сверяет отчет с сохраненным базовым.
+"""
+import asyncio
+import io
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import OperationalError, connections, transaction
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from yatube.handlers import ASGIHandler, get_environ
+from yatube.queries import QueryRecorder
+
+from .models import Comment, Follow, Group, Post, User
+from .rebuild import rebuild_denormalized
+
+
+BATCH_SIZE = 1000
+USERNAME_PREFIX = "bench_user_"
+GROUP_SLUG_PREFIX = "bench-group-"
+# Рост p95 меньше этого порога считается шумом измерений.
+NOISE_MS = 1.0
+# Адрес не из INTERNAL_IPS: панель django-debug-toolbar не должна
+# искажать замеры.
+REMOTE_ADDR = "192.0.2.1"
+
+WORDS = (
+    "утро вечер город река лес дорога книга музыка кино море горы "
+    "дождь снег солнце друг работа отпуск кофе чай кот собака поезд"
+).split()
+
+
+def _batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate(users, groups, posts, comments, follows, seed=0, log=None):
+    """
+    Создает данные для замеров. Сигналы при bulk_create не срабатывают,
+    поэтому счетчики, ленты и поисковый индекс пересчитываются в конце.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+
+    first_user = User.objects.count()
+    for batch in _batches(
+        User(username=f"{USERNAME_PREFIX}{first_user + number}",
+             password="!")
+        for number in range(users)
+    ):
+        User.objects.bulk_create(batch)
+    log(f"Пользователей: {users}")
+
+    first_group = Group.objects.count()
+    for batch in _batches(
+        Group(title=f"Группа {first_group + number}",
+              slug=f"{GROUP_SLUG_PREFIX}{first_group + number}",
+              description=_text(rng, 10))
+        for number in range(groups)
+    ):
+        Group.objects.bulk_create(batch)
+    log(f"Групп: {groups}")
+
+    user_ids = list(User.objects.values_list("pk", flat=True))
+    group_ids = list(Group.objects.values_list("pk", flat=True)) + [None]
+    for batch in _batches(
+        Post(author_id=rng.choice(user_ids),
+             group_id=rng.choice(group_ids),
+             text=_text(rng, rng.randint(5, 60)))
+        for _ in range(posts)
+    ):
+        Post.objects.bulk_create(batch)
+    log(f"Постов: {posts}")
+
+    post_ids = list(Post.objects.values_list("pk", flat=True))
+    for batch in _batches(
+        Comment(post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=_text(rng, rng.randint(3, 20)))
+        for _ in range(comments if post_ids else 0)
+    ):
+        Comment.objects.bulk_create(batch)
+    log(f"Комментариев: {comments}")
+
+    for batch in _batches(
+        Follow(user_id=rng.choice(user_ids), author_id=rng.choice(user_ids))
+        for _ in range(follows)
+    ):
+        Follow.objects.bulk_create(
+            [follow for follow in batch if follow.user_id != follow.author_id],
+            ignore_conflicts=True,
+        )
+    log(f"Подписок: до {follows}")
+
+    rebuild_denormalized(log)
+
+
+class Scenario:
+    def __init__(self, name, url_name, authenticated=True, method="get",
+                 data=None):
+        self.name = name
+        self.url_name = url_name
+        self.authenticated = authenticated
+        self.method = method
+        self.data = data
+
+
+SCENARIOS = (
+    Scenario("index (anonymous)", "index", authenticated=False),
+    Scenario("index", "index"),
+    Scenario("group_posts", "group_posts"),
+    Scenario("profile", "profile"),
+    Scenario("post_view", "post"),
+    Scenario("follow_index", "follow_index"),
+    Scenario("new_post", "new_post", method="post",
+             data={"text": "Запись из нагрузочного теста"}),
+    Scenario("add_comment", "add_comment", method="post",
+             data={"text": "Комментарий из нагрузочного теста"}),
+)
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def _url_args(scenario, rng, post, group_slugs):
+    if scenario.url_name == "group_posts":
+        return [rng.choice(group_slugs)]
+    if scenario.url_name == "profile":
+        return [post.author.username]
+    if scenario.url_name in ("post", "add_comment"):
+        return [post.author.username, post.pk]
+    return []
+
+
+def run(requests=100, seed=0, scenarios=SCENARIOS, keep_writes=False):
+    """
+    Выполняет каждый сценарий requests раз и возвращает отчет
+    {сценарий: метрики}. Изменения данных откатываются,
+    если не указан keep_writes.
+    """
+    rng = random.Random(seed)
+    # Пользователь с подписками, чтобы лента follow_index не была пустой.
+    user_id = (Follow.objects.values_list("user", flat=True).first()
+               or User.objects.values_list("pk", flat=True).first())
+    post_ids = list(Post.objects.values_list("pk", flat=True)[:10000])
+    if not post_ids:
+        raise ValueError("Нет постов: сначала сгенерируйте данные.")
+    user = User.objects.get(pk=user_id)
+    group_slugs = list(Group.objects.values_list("slug", flat=True)[:1000])
+    anonymous = Client(REMOTE_ADDR=REMOTE_ADDR)
+    authorized = Client(REMOTE_ADDR=REMOTE_ADDR)
+    authorized.force_login(user)
+    report = {}
+    with transaction.atomic():
+        for scenario in scenarios:
+            if scenario.url_name == "group_posts" and not group_slugs:
+                continue
+            client = authorized if scenario.authenticated else anonymous
+            request = getattr(client, scenario.method)
+            posts = list(Post.objects.select_related("author").in_bulk(
+                [rng.choice(post_ids) for _ in range(requests)]
+            ).values())
+            latencies = []
+            queries = []
+            started = time.perf_counter()
+            for _ in range(requests):
+                url = reverse(scenario.url_name, args=_url_args(
+                    scenario, rng, rng.choice(posts), group_slugs
+                ))
+                with QueryRecorder() as recorder:
+                    request_started = time.perf_counter()
+                    response = request(url, scenario.data)
+                    latencies.append(time.perf_counter() - request_started)
+                if response.status_code >= 400:
+                    raise ValueError(
+                        f"{scenario.name}: {url} -> {response.status_code}"
+                    )
+                queries.append(len(recorder))
+            elapsed = time.perf_counter() - started
+            report[scenario.name] = {
+                "requests": requests,
+                "p50_ms": _percentile(latencies, 50) * 1000,
+                "p95_ms": _percentile(latencies, 95) * 1000,
+                "p99_ms": _percentile(latencies, 99) * 1000,
+                "queries": statistics.mean(queries),
+                "max_queries": max(queries),
+                "rps": requests / elapsed,
+            }
+        transaction.set_rollback(not keep_writes)
+    return report
+
+
+WRITE_MARKER = "Запись из теста конкурентной записи"
+
+
+def run_writes(threads=8, writes=50, seed=0):
+    """
+    Запускает threads потоков, каждый выполняет writes запросов
+    new_post и add_comment по очереди от своего пользователя.
+    Возвращает задержки, число ошибок и записей в секунду.
+    Созданные записи удаляются после замера.
+    """
+    user_ids = list(User.objects.values_list("pk", flat=True)[:threads])
+    post_ids = list(Post.objects.values_list("pk", flat=True)[:10000])
+    if len(user_ids) < threads or not post_ids:
+        raise ValueError("Мало данных: сначала сгенерируйте данные.")
+    posts = Post.objects.select_related("author").in_bulk(post_ids[:1000])
+    targets = [
+        reverse("add_comment", args=[post.author.username, post.pk])
+        for post in posts.values()
+    ]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    clients = []
+    for user in User.objects.filter(pk__in=user_ids):
+        client = Client(REMOTE_ADDR=REMOTE_ADDR)
+        client.force_login(user)
+        clients.append(client)
+
+    def worker(number):
+        rng = random.Random(seed + number)
+        client = clients[number]
+        try:
+            for step in range(writes):
+                url = (reverse("new_post") if step % 2 == 0
+                       else rng.choice(targets))
+                started = time.perf_counter()
+                try:
+                    response = client.post(url, {"text": WRITE_MARKER})
+                    failed = response.status_code >= 400
+                except OperationalError:
+                    failed = True
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    if failed:
+                        errors.append(url)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(number,))
+            for number in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    Comment.objects.filter(text=WRITE_MARKER).delete()
+    for post in Post.objects.filter(text=WRITE_MARKER):
+        post.delete()
+    return {
+        "threads": threads,
+        "writes": len(latencies),
+        "errors": len(errors),
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "writes_per_s": (len(latencies) - len(errors)) / elapsed,
+    }
+
+
+class _SlowInput:
+    """
+    wsgi.input клиента, передающего тело по chunk_size байт
+    раз в delay секунд.
+    """
+
+    def __init__(self, body, delay, chunk_size):
+        self.file = io.BytesIO(body)
+        self.delay = delay
+        self.chunk_size = chunk_size
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        time.sleep(self.delay * math.ceil(len(data) / self.chunk_size))
+        return data
+
+    def readline(self, size=-1):
+        data = self.file.readline(size)
+        time.sleep(self.delay * math.ceil(len(data) / self.chunk_size))
+        return data
+
+
+def _slow_client_requests(user, post, upload_size):
+    """
+    Запросы одного клиента: две страницы и отправка формы нового поста
+    с файлом upload_size байт (это не картинка, поэтому форма
+    возвращается с ошибкой и пост не создается).
+    """
+    client = Client()
+    client.force_login(user)
+    request = HttpRequest()
+    token = get_token(request)
+    cookie = (f"{settings.SESSION_COOKIE_NAME}="
+              f"{client.cookies[settings.SESSION_COOKIE_NAME].value}; "
+              f"{settings.CSRF_COOKIE_NAME}={request.META['CSRF_COOKIE']}")
+    upload = encode_multipart(BOUNDARY, {
+        "csrfmiddlewaretoken": token,
+        "text": "",
+        "image": SimpleUploadedFile("upload.jpg", b"\0" * upload_size,
+                                    "image/jpeg"),
+    })
+    pages = [
+        reverse("index"),
+        reverse("post", args=[post.author.username, post.pk]),
+    ]
+    requests = [("GET", path, [], b"") for path in pages]
+    requests.append(("POST", reverse("new_post"),
+                     [(b"content-type", MULTIPART_CONTENT.encode()),
+                      (b"content-length", str(len(upload)).encode())],
+                     upload))
+    return [
+        ({
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"),
+                        (b"cookie", cookie.encode())] + headers,
+            "client": (REMOTE_ADDR, 0),
+            "server": ("testserver", 80),
+        }, body)
+        for method, path, headers, body in requests
+    ]
+
+
+def _slow_report(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "rps": len(latencies) / elapsed,
+    }
+
+
+def _run_wsgi(application, requests, clients, threads, delay, chunk_size):
+    # Многопоточный WSGI-сервер: поток читает тело и пишет ответ
+    # со скоростью клиента.
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def handle(scope, body):
+        environ = get_environ(scope, _SlowInput(body, delay, chunk_size))
+        status = []
+        result = application(environ,
+                             lambda line, headers: status.append(line))
+        try:
+            for chunk in result:
+                time.sleep(delay * math.ceil(len(chunk) / chunk_size))
+        finally:
+            result.close()
+        return int(status[0].split()[0])
+
+    with ThreadPoolExecutor(threads) as executor:
+        def client():
+            for scope, body in requests:
+                started = time.perf_counter()
+                status = executor.submit(handle, scope, body).result()
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    if status >= 400:
+                        errors.append(scope["path"])
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    return _slow_report(latencies, len(errors), elapsed)
+
+
+def _run_asgi(application, requests, clients, threads, delay, chunk_size):
+    # Тот же клиент через ASGI-адаптер: обмен идет в цикле событий.
+    latencies = []
+    errors = []
+    handler = ASGIHandler(application, max_workers=threads)
+
+    async def request(scope, body):
+        chunks = [body[start:start + chunk_size]
+                  for start in range(0, len(body), chunk_size)] or [b""]
+        disconnect = asyncio.Event()
+        statuses = []
+
+        async def receive():
+            if not chunks:
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+            await asyncio.sleep(delay if body else 0)
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk,
+                    "more_body": bool(chunks)}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+            else:
+                await asyncio.sleep(
+                    delay * math.ceil(len(message["body"]) / chunk_size)
+                )
+
+        await handler(scope, receive, send)
+        disconnect.set()
+        return statuses[0]
+
+    async def client():
+        for scope, body in requests:
+            started = time.perf_counter()
+            status = await request(scope, body)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(scope["path"])
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(main())
+    finally:
+        handler.shutdown()
+    elapsed = time.perf_counter() - started
+    return _slow_report(latencies, len(errors), elapsed)
+
+
+def run_slow_clients(clients=32, threads=4, delay=0.02, chunk_size=16384,
+                     upload_size=262144):
+    """
+    Обслуживает clients одновременных медленных клиентов (каждый
+    передает и принимает chunk_size байт раз в delay секунд) пулом из
+    threads потоков: как многопоточный WSGI-сервер и через ASGI-адаптер.
+    Возвращает {"wsgi": метрики, "asgi": метрики}.
+    """
+    post = Post.objects.select_related("author").first()
+    user = User.objects.order_by("pk").first()
+    if post is None or user is None:
+        raise ValueError("Нет постов: сначала сгенерируйте данные.")
+    requests = _slow_client_requests(user, post, upload_size)
+    application = WSGIHandler()
+    arguments = (application, requests, clients, threads, delay, chunk_size)
+    return {
+        "wsgi": _run_wsgi(*arguments),
+        "asgi": _run_asgi(*arguments),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Возвращает список регрессий: p95 выросла больше чем на tolerance
+    (доля) и NOISE_MS или увеличилось число запросов к БД.
+    """
+    regressions = []
+    for name, metrics in report.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if metrics["p95_ms"] > base["p95_ms"] * (1 + tolerance) + NOISE_MS:
+            regressions.append(
+                f"{name}: p95 {metrics['p95_ms']:.1f} ms, "
+                f"было {base['p95_ms']:.1f} ms"
+            )
+        if metrics["max_queries"] > base["max_queries"]:
+            regressions.append(
+                f"{name}: запросов {metrics['max_queries']}, "
+                f"было {base['max_queries']}"
+            )
+    return regressions
@@ -0,0 +1,157 @@
+"""
+Кэш страниц лент для анонимных посетителей.
+
+Страница хранится долго и сбрасывается сразу при изменении данных:
+в ключ входят счетчики поколений (generation) областей, от которых она
+зависит ("index", "group:<slug>", "profile:<username>" и общий "all").
+Сигналы увеличивают счетчики при записи постов, комментариев и групп.
+Устаревшую страницу отдает кэш, пока один запрос строит новую
+(stale-while-revalidate), поэтому промах не нагружает БД лавиной.
+
+Области и адреса содержат ввод пользователя (slug, имя, путь), поэтому
+в ключи кэша попадает их хэш: memcached не принимает пробелы,
+управляющие символы и ключи длиннее 250 байт.
+"""
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+
+from .settings import (FEED_CACHE_FRESH_TIME, FEED_CACHE_LOCK_TIME,
+                       FEED_CACHE_TIME)
+
+
+GENERATION_KEY = "feed-generation:{}"
+PAGE_KEY = "feed-page:{}"
+LOCK_KEY = "feed-page-lock:{}"
+ALL_SCOPE = "all"
+LOCK_WAIT_STEP = 0.05
+
+
+def bump_generations(*scopes):
+    """
+    Сбрасывает кэш страниц, зависящих от перечисленных областей.
+    """
+    for scope in set(scopes):
+        key = generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), None)
+
+
+def bump_post_pages(author_username, group_slugs):
+    """
+    Сбрасывает кэш страниц лент, на которых показан пост.
+    """
+    bump_generations(
+        "index",
+        f"profile:{author_username}",
+        *(f"group:{slug}" for slug in group_slugs if slug),
+    )
+
+
+def generation_key(scope):
+    return GENERATION_KEY.format(_digest(scope))
+
+
+def get_generations(scopes):
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Счетчик мог быть вытеснен из кэша: новое значение должно
+            # быть больше любого выданного ранее, иначе вернется
+            # страница, сохраненная до вытеснения.
+            cache.add(key, _initial_generation(), None)
+            generations[key] = cache.get(key)
+    return tuple(generations[key] for key in keys)
+
+
+def cache_feed_page(*scopes):
+    """
+    Кэширует страницу для анонимных GET-запросов.
+    Области могут ссылаться на аргументы представления:
+    @cache_feed_page("group:{slug}").
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ("GET", "HEAD")
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            version = get_generations(
+                [ALL_SCOPE] + [scope.format(**kwargs) for scope in scopes]
+            )
+            digest = _digest(request.get_full_path())
+            page_key = PAGE_KEY.format(digest)
+            lock_key = LOCK_KEY.format(digest)
+            token = None
+            entry = cache.get(page_key)
+            if entry is None:
+                entry, token = _wait_for_rebuild(page_key, lock_key)
+            if entry is not None:
+                cached_version, fresh_until, response = entry
+                if cached_version == version and fresh_until > time.time():
+                    return response
+                token = _acquire_lock(lock_key)
+                if token is None:
+                    return response
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not (
+                    response.streaming or response.cookies
+                ):
+                    cache.set(
+                        page_key,
+                        (version, time.time() + FEED_CACHE_FRESH_TIME,
+                         response),
+                        FEED_CACHE_TIME,
+                    )
+            finally:
+                _release_lock(lock_key, token)
+            return response
+        return wrapper
+    return decorator
+
+
+def _wait_for_rebuild(page_key, lock_key):
+    """
+    При промахе страницу строит только один запрос,
+    остальные ждут ее появления в кэше не дольше FEED_CACHE_LOCK_TIME.
+    Возвращает (страница или None, токен захваченной блокировки).
+    """
+    token = _acquire_lock(lock_key)
+    if token is not None:
+        return None, token
+    deadline = time.time() + FEED_CACHE_LOCK_TIME
+    while time.time() < deadline:
+        time.sleep(LOCK_WAIT_STEP)
+        entry = cache.get(page_key)
+        if entry is not None:
+            return entry, None
+    return None, None
+
+
+def _acquire_lock(lock_key):
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, FEED_CACHE_LOCK_TIME):
+        return token
+    return None
+
+
+def _release_lock(lock_key, token):
+    # Блокировку снимает только тот, кто ее взял: запрос, не дождавшийся
+    # чужой сборки страницы, не должен снимать чужую блокировку.
+    if token is not None and cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _initial_generation():
+    return int(time.time() * 1000)
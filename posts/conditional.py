@@ -0,0 +1,47 @@
+"""
+Условные GET-запросы (ETag) для страниц лент и постов.
+
+ETag страницы строится без запросов к БД: из счетчиков поколений кэша
+(см. posts.cache), которые сигналы увеличивают при любом изменении
+показанных на странице данных, пользователя, CSRF-cookie (страница может
+содержать форму) и адреса. Совпавший валидатор дает ответ 304 без
+выборки данных и отрисовки шаблона.
+
+Last-Modified страницы не отдают: дата последнего поста не меняется
+при удалении поста, правке, подписке или входе пользователя, и ответ
+304 по If-Modified-Since показал бы устаревшую страницу.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.views.decorators.http import condition
+
+from .cache import ALL_SCOPE, get_generations
+
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def conditional_page(*scopes):
+    """
+    Добавляет странице ETag. Области, как в cache_feed_page, могут
+    ссылаться на аргументы представления.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return None
+        raw = json.dumps(
+            [
+                get_generations([ALL_SCOPE] + [
+                    scope.format(**kwargs) for scope in scopes
+                ]),
+                request.user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                request.get_full_path(),
+            ],
+            separators=(",", ":"),
+        )
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    return condition(etag_func=etag_func)
@@ -0,0 +1,10 @@
+from .settings import POST_ITEM_CACHE_TIME
+
+
+def cache_times(request):
+    """
+    Добавляет время кэширования фрагментов шаблонов.
+    """
+    return {
+        'post_item_cache_time': POST_ITEM_CACHE_TIME
+    }
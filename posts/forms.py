@@ -1,5 +1,7 @@
 from django import forms
 
+from yatube.images import clean_image_upload, limit_image_field
+
 from .models import Comment, Group, Post
 
 
@@ -12,6 +14,13 @@ class PostForm(forms.ModelForm):
             "image",
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        limit_image_field(self.fields["image"])
+
+    def clean_image(self):
+        return clean_image_upload(self.cleaned_data["image"])
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
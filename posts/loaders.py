@@ -0,0 +1,27 @@
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from yatube.loaders import register
+
+from .models import Follow, User
+
+
+def following_flag(request, author):
+    """
+    Выражение "текущий пользователь подписан на автора" для annotate();
+    author - ссылка на автора во внешнем запросе.
+    """
+    if not request.user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    return Exists(Follow.objects.filter(user=request.user,
+                                        author=OuterRef(author)))
+
+
+@register("authors")
+def load_authors(request, usernames):
+    """
+    Авторы с профилем, счетчиками и признаком подписки одним запросом.
+    """
+    authors = User.objects.select_related("profile", "stats").filter(
+        username__in=usernames
+    ).annotate(is_following=following_flag(request, "pk"))
+    return {author.username: author for author in authors}
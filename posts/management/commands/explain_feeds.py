@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Comment, Follow, Post, TimelineEntry, User
+from posts.settings import POSTS_PER_PAGE
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает планы и время запросов лент с индексами "
+        "и без них (индексы удаляются в откатываемой транзакции)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Сколько раз выполнить каждый запрос для замера времени.",
+        )
+
+    def handle(self, *args, **options):
+        queries = self.get_queries()
+        with transaction.atomic():
+            after = self.measure(queries, options["repeat"], "after")
+            self.drop_indexes()
+            before = self.measure(queries, options["repeat"], "before")
+            transaction.set_rollback(True)
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for title, results in (("Без индексов", before),
+                                   ("С индексами", after)):
+                plan, elapsed = results[name]
+                self.stdout.write(f"  {title}: {elapsed:.3f} ms")
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+    def get_queries(self):
+        page_size = POSTS_PER_PAGE + 1
+        post = Post.objects.order_by().first()
+        user = User.objects.order_by().first()
+        post_id = post.pk if post else 0
+        author_id = post.author_id if post else 0
+        group_id = (
+            Post.objects.exclude(group=None).order_by()
+            .values_list("group_id", flat=True).first() or 0
+        )
+        user_id = user.pk if user else 0
+        posts = Post.objects.select_related("author", "group")
+        posts = posts.order_by("-pub_date", "-id")
+        return {
+            "index": posts[:page_size],
+            "group_posts": posts.filter(group_id=group_id)[:page_size],
+            "profile": posts.filter(author_id=author_id)[:page_size],
+            "follow_index": TimelineEntry.objects.filter(
+                user_id=user_id
+            ).order_by("-pub_date", "-post_id")[:page_size],
+            "post_view comments": Comment.objects.filter(
+                post_id=post_id
+            ).order_by("-created", "-id"),
+            "profile following": Follow.objects.filter(
+                user_id=user_id,
+                author_id=author_id,
+            ),
+        }
+
+    def measure(self, queries, repeat, label):
+        results = {}
+        for name, queryset in queries.items():
+            plan = self.explain(queryset, label)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) * 1000 / repeat
+            results[name] = (plan, elapsed)
+        return results
+
+    def explain(self, queryset, label):
+        # Метка делает текст запроса уникальным: иначе SQLite может
+        # вернуть план из кэша подготовленных выражений.
+        sql, params = queryset.query.sql_with_params()
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql} /* {label} */", params)
+            return "\n".join(
+                " ".join(str(value) for value in row)
+                for row in cursor.fetchall()
+            )
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in (Post, Comment, TimelineEntry):
+                for index in model._meta.indexes:
+                    cursor.execute(
+                        f"DROP INDEX {connection.ops.quote_name(index.name)}"
+                    )
@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты, комментарии и подписки "
+        "в файлы JSON Lines или CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Каталог для файлов.")
+        parser.add_argument(
+            "--format",
+            choices=transfer.FORMATS,
+            default="jsonl",
+        )
+        parser.add_argument(
+            "--kinds",
+            nargs="+",
+            choices=list(transfer.KINDS),
+            default=list(transfer.KINDS),
+            help="Что выгружать (по умолчанию все).",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        os.makedirs(options["directory"], exist_ok=True)
+        for kind in options["kinds"]:
+            progress = transfer.Progress(self.stdout.write, kind)
+            count = transfer.export_kind(
+                options["directory"], kind, options["format"],
+                options["batch_size"], progress,
+            )
+            progress.report(count)
+        self.stdout.write(self.style.SUCCESS("Выгрузка завершена"))
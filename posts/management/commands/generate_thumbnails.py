@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.models import Post
+from posts.thumbnails import (generate_post_thumbnail,
+                              generate_profile_thumbnails)
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Готовит миниатюры изображений постов и аватаров, "
+        "у которых их еще нет."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересоздать миниатюры для всех изображений.",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="").exclude(image=None)
+        profiles = Profile.objects.exclude(image="").exclude(image=None)
+        if not options["all"]:
+            posts = posts.filter(
+                Q(thumbnail_url="") | Q(thumbnail_webp_srcset="")
+            )
+            profiles = profiles.filter(thumbnail_url="")
+        post_ids = list(posts.values_list("pk", flat=True))
+        profile_ids = list(profiles.values_list("pk", flat=True))
+        for post_id in post_ids:
+            generate_post_thumbnail(post_id)
+        for profile_id in profile_ids:
+            generate_profile_thumbnails(profile_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано постов: {len(post_ids)}, "
+            f"аватаров: {len(profile_ids)}"
+        ))
@@ -0,0 +1,68 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+from posts.rebuild import rebuild_denormalized
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает файлы, созданные export_data, пачками через "
+        "bulk_create и пересчитывает денормализованные данные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Каталог с файлами.")
+        parser.add_argument(
+            "--format",
+            choices=transfer.FORMATS,
+            default="jsonl",
+        )
+        parser.add_argument(
+            "--kinds",
+            nargs="+",
+            choices=list(transfer.KINDS),
+            default=list(transfer.KINDS),
+            help="Что загружать (по умолчанию все найденные файлы).",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Продолжить прерванную загрузку с сохраненного места.",
+        )
+        parser.add_argument(
+            "--no-rebuild",
+            action="store_true",
+            help="Не пересчитывать счетчики, ленты и поисковый индекс.",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        if not os.path.isdir(directory):
+            raise CommandError(f"Каталог {directory} не найден")
+        checkpoints = (
+            transfer.load_checkpoints(directory) if options["resume"] else {}
+        )
+        for kind in transfer.KINDS:
+            path = transfer.data_path(directory, kind, options["format"])
+            if kind not in options["kinds"] or not os.path.exists(path):
+                continue
+
+            def checkpoint(done, kind=kind):
+                checkpoints[kind] = done
+                transfer.save_checkpoints(directory, checkpoints)
+
+            progress = transfer.Progress(self.stdout.write, kind)
+            count = transfer.import_kind(
+                directory, kind, options["format"], options["batch_size"],
+                checkpoints.get(kind, 0), progress, checkpoint,
+            )
+            progress.report(count)
+        if not options["no_rebuild"]:
+            rebuild_denormalized(self.stdout.write)
+        progress_file = os.path.join(directory, transfer.PROGRESS_FILE)
+        if os.path.exists(progress_file):
+            os.remove(progress_file)
+        self.stdout.write(self.style.SUCCESS("Загрузка завершена"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет счетчики подписчиков, подписок и записей авторов "
+        "с данными и создает недостающие записи."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "user_ids",
+            nargs="*",
+            type=int,
+            help="Идентификаторы пользователей (по умолчанию все).",
+        )
+
+    def handle(self, *args, **options):
+        updated = AuthorStats.objects.recount(options["user_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересчитано авторов: {updated}"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает количество комментариев у постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "post_ids",
+            nargs="*",
+            type=int,
+            help="Идентификаторы постов (по умолчанию все посты).",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options["post_ids"]:
+            posts = posts.filter(pk__in=options["post_ids"])
+        updated = posts.recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересчитано постов: {updated}"
+        ))
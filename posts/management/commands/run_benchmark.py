@@ -0,0 +1,90 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержки, число запросов к БД и пропускную способность "
+        "представлений и сравнивает их с базовым отчетом."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=100,
+            help="Число запросов на сценарий.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--baseline",
+            help="JSON базового отчета для сравнения.",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            help="Сохранить отчет в указанный JSON как базовый.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Допустимый рост p95 относительно базового (доля).",
+        )
+        parser.add_argument(
+            "--keep-writes",
+            action="store_true",
+            help="Не откатывать посты и комментарии, созданные замером.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = benchmark.run(
+                requests=options["requests"],
+                seed=options["seed"],
+                keep_writes=options["keep_writes"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.print_report(report)
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as file:
+                json.dump(
+                    {"environment": self.environment(), "scenarios": report},
+                    file, ensure_ascii=False, indent=2,
+                )
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)["scenarios"]
+            regressions = benchmark.compare(report, baseline,
+                                            options["tolerance"])
+            if regressions:
+                raise CommandError(
+                    "Регрессии относительно базового отчета:\n"
+                    + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("Регрессий нет"))
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'сценарий':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'запросов':>10}{'rps':>9}"
+        )
+        for name, metrics in report.items():
+            self.stdout.write(
+                f"{name:<20}{metrics['p50_ms']:>9.1f}"
+                f"{metrics['p95_ms']:>9.1f}{metrics['p99_ms']:>9.1f}"
+                f"{metrics['queries']:>10.1f}{metrics['rps']:>9.1f}"
+            )
+
+    def environment(self):
+        return {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "posts": Post.objects.count(),
+        }
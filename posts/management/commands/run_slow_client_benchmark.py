@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает обслуживание медленных клиентов многопоточным "
+        "WSGI-сервером и ASGI-адаптером при одинаковом числе потоков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=32)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.02,
+            help="Пауза клиента между фрагментами, секунды.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=16384,
+            help="Размер фрагмента, который клиент передает за паузу.",
+        )
+        parser.add_argument(
+            "--upload-size",
+            type=int,
+            default=262144,
+            help="Размер загружаемого файла, байты.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = benchmark.run_slow_clients(
+                clients=options["clients"],
+                threads=options["threads"],
+                delay=options["delay"],
+                chunk_size=options["chunk_size"],
+                upload_size=options["upload_size"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f"{'режим':<6}{'запросов':>10}{'ошибок':>8}"
+            f"{'p50, ms':>10}{'p95, ms':>10}{'в секунду':>11}"
+        )
+        for mode, metrics in report.items():
+            self.stdout.write(
+                f"{mode:<6}{metrics['requests']:>10}{metrics['errors']:>8}"
+                f"{metrics['p50_ms']:>10.1f}{metrics['p95_ms']:>10.1f}"
+                f"{metrics['rps']:>11.1f}"
+            )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет пропускную способность записи (new_post, add_comment) "
+        "при нескольких одновременных писателях."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--writes",
+            type=int,
+            default=50,
+            help="Число запросов на поток.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            report = benchmark.run_writes(
+                threads=options["threads"],
+                writes=options["writes"],
+                seed=options["seed"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            "потоков {threads}, записей {writes}, ошибок {errors}\n"
+            "p50 {p50_ms:.1f} ms, p95 {p95_ms:.1f} ms, p99 {p99_ms:.1f} ms\n"
+            "записей в секунду {writes_per_s:.1f}".format(**report)
+        )
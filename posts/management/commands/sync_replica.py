@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную БД SQLite в файлы реплик "
+        "(для проверки чтения из реплик на локальной машине)."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("Реплики не настроены (YATUBE_REPLICA_DB)")
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if not primary["ENGINE"].endswith("sqlite3"):
+            raise CommandError("Команда работает только с SQLite")
+        source = sqlite3.connect(primary["NAME"])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: скопирована")
+        finally:
+            source.close()
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.6 on 2026-10-18 15:45
+
+import re
+from collections import Counter
+
+from django.db import OperationalError, migrations, models, transaction
+import django.db.models.deletion
+
+
+SEARCH_TABLE = 'posts_post_search'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+                        f'text, tokenize="unicode61 remove_diacritics 2")'
+                    )
+                    cursor.execute(
+                        f'INSERT INTO {SEARCH_TABLE} (rowid, text) '
+                        f'SELECT id, text FROM posts_post'
+                    )
+            return
+        except OperationalError:
+            # SQLite собран без FTS5: используется индекс PostTerm.
+            pass
+    Post = apps.get_model('posts', 'Post')
+    PostTerm = apps.get_model('posts', 'PostTerm')
+    for post_id, text in Post.objects.values_list('pk', 'text').iterator():
+        terms = Counter(
+            token[:64] for token in re.findall(r'\w+', text.lower())
+        )
+        PostTerm.objects.bulk_create(
+            PostTerm(post_id=post_id, term=term, count=count)
+            for term, count in terms.items()
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_post_thumbnail_srcset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('count', models.PositiveIntegerField(verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_post_term'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
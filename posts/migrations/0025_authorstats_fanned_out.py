@@ -0,0 +1,22 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_authorstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='fanned_out',
+            field=models.BooleanField(default=True, verbose_name='Раскладывается по лентам'),
+        ),
+        migrations.AddIndex(
+            model_name='authorstats',
+            index=models.Index(condition=models.Q(fanned_out=False), fields=['fanned_out'], name='stats_not_fanned_out_idx'),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
 from django.db.models.fields.related import ForeignKey
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -21,6 +24,26 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def recount_comments(self):
+        """
+        Пересчитывает денормализованное поле comments_count.
+        """
+        comments = Comment.objects.filter(
+            post=OuterRef("pk")
+        ).order_by().values("post").annotate(count=Count("pk"))
+        return self.update(
+            comments_count=Coalesce(Subquery(comments.values("count")), 0),
+            modified=timezone.now(),
+        )
+
+    def touch(self):
+        """
+        Обновляет дату изменения постов, сбрасывая кэш их карточек.
+        """
+        return self.update(modified=timezone.now())
+
+
 class Post(models.Model):
     text = models.TextField(
         "Текст",
@@ -51,6 +74,33 @@ class Post(models.Model):
         null=True,
         help_text="Выберите изображение",
     )
+    thumbnail_url = models.CharField(
+        "Миниатюра",
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    thumbnail_srcset = models.TextField(
+        "Варианты миниатюры",
+        blank=True,
+        editable=False,
+    )
+    thumbnail_webp_srcset = models.TextField(
+        "Варианты миниатюры WebP",
+        blank=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев",
+        default=0,
+        editable=False,
+    )
+    modified = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
@@ -59,6 +109,20 @@ class Post(models.Model):
         ordering = (
             "-pub_date",
         )
+        indexes = (
+            models.Index(
+                fields=("-pub_date", "-id"),
+                name="post_pub_date_idx",
+            ),
+            models.Index(
+                fields=("author", "-pub_date", "-id"),
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=("group", "-pub_date", "-id"),
+                name="post_group_pub_date_idx",
+            ),
+        )
 
 
 class Comment(models.Model):
@@ -85,6 +149,16 @@ class Comment(models.Model):
         ordering = (
             "-created",
         )
+        indexes = (
+            models.Index(
+                fields=("post", "-created", "-id"),
+                name="comment_post_created_idx",
+            ),
+            models.Index(
+                fields=("-created", "-id"),
+                name="comment_created_idx",
+            ),
+        )
 
 
 class Follow(models.Model):
@@ -98,3 +172,160 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name="following",
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "author"),
+                name="unique_follow",
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    """
+    Запись персональной ленты подписок: пост автора, на которого
+    подписан пользователь. Заполняется при публикации поста
+    (fan-out on write), поэтому лента читается без JOIN с Follow.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    pub_date = models.DateTimeField(
+        "Дата публикации",
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "post"),
+                name="unique_timeline_entry",
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("user", "-pub_date", "-post"),
+                name="timeline_user_pub_date_idx",
+            ),
+        )
+
+
+class PostTerm(models.Model):
+    """
+    Инвертированный индекс текста постов: слово и число его вхождений
+    в пост. Используется поиском, когда БД не поддерживает FTS5.
+    """
+    term = models.CharField(
+        "Слово",
+        max_length=64,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="terms",
+    )
+    count = models.PositiveIntegerField(
+        "Число вхождений",
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("term", "post"),
+                name="unique_post_term",
+            ),
+        )
+
+
+class AuthorStatsQuerySet(models.QuerySet):
+    def recount(self, user_ids=None):
+        """
+        Создает недостающие записи и пересчитывает счетчики
+        пользователей user_ids (по умолчанию всех).
+        """
+        users = User.objects.all()
+        if user_ids is not None:
+            users = users.filter(pk__in=user_ids)
+        self.bulk_create(
+            (AuthorStats(user_id=user_id)
+             for user_id in users.values_list("pk", flat=True).iterator()),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        stats = self.filter(user__in=users)
+
+        def count(queryset, field):
+            return Coalesce(Subquery(
+                queryset.filter(**{field: OuterRef("user")})
+                .order_by().values(field).annotate(count=Count("pk"))
+                .values("count")
+            ), 0)
+
+        return stats.update(
+            followers_count=count(Follow.objects.all(), "author"),
+            following_count=count(Follow.objects.all(), "user"),
+            posts_count=count(Post.objects.all(), "author"),
+        )
+
+
+class AuthorStats(models.Model):
+    """
+    Денормализованные счетчики автора для карточки профиля.
+    Обновляются сигналами в той же транзакции, что и подписки и посты.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    followers_count = models.PositiveIntegerField(
+        "Подписчиков",
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        "Подписок",
+        default=0,
+    )
+    posts_count = models.PositiveIntegerField(
+        "Записей",
+        default=0,
+    )
+    # Сбрасывается, когда автор становится "знаменитостью" (см.
+    # posts.timeline): его посты перестают раскладываться по лентам.
+    fanned_out = models.BooleanField(
+        "Раскладывается по лентам",
+        default=True,
+    )
+
+    objects = AuthorStatsQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("followers_count",),
+                name="stats_followers_count_idx",
+            ),
+            models.Index(
+                fields=("fanned_out",),
+                name="stats_not_fanned_out_idx",
+                condition=models.Q(fanned_out=False),
+            ),
+        )
+
+    @classmethod
+    def change(cls, user_id, **deltas):
+        """
+        Изменяет счетчики пользователя на deltas (followers_count=1, ...).
+        """
+        cls.objects.filter(pk=user_id).update(**{
+            field: Greatest(F(field) + delta, 0)
+            for field, delta in deltas.items()
+        })
@@ -0,0 +1,137 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class CursorPaginator:
+    """
+    Постраничная навигация по ключу сортировки (keyset pagination).
+
+    Вместо COUNT(*) и OFFSET страница выбирается условием
+    "строго после/до ключа последней показанной записи", поэтому
+    любая страница стоит столько же, сколько первая.
+    Курсор передается клиенту в виде непрозрачного токена.
+    """
+
+    NEXT = "n"
+    PREVIOUS = "p"
+
+    def __init__(self, object_list, per_page, ordering=("-pub_date", "-id")):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip("-") for name in self.ordering]
+
+    def get_page(self, cursor=None):
+        """
+        Возвращает страницу, начинающуюся за курсором.
+        Некорректный курсор трактуется как отсутствующий.
+        """
+        direction, values = self.decode(cursor)
+        return self.make_page(self.fetch(direction, values), direction, values)
+
+    def fetch(self, direction, values):
+        """
+        Выбирает до per_page + 1 строк за ключом values
+        в порядке обхода (для PREVIOUS - в обратном порядке).
+        """
+        queryset = self.object_list.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(values, direction == self.PREVIOUS)
+            )
+            if direction == self.PREVIOUS:
+                queryset = queryset.reverse()
+        return list(queryset[:self.per_page + 1])
+
+    def make_page(self, rows, direction, values):
+        """
+        Собирает страницу из строк, выбранных fetch().
+        """
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == self.PREVIOUS:
+            rows.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        # Обычные Page и Paginator строятся поверх уже выбранных строк,
+        # чтобы шаблоны и код, ожидающие их, работали без запросов к БД.
+        page = Page(rows, 1, Paginator(rows, self.per_page))
+        page.next_cursor = (
+            self.encode(self.NEXT, rows[-1]) if has_next and rows else None
+        )
+        page.previous_cursor = (
+            self.encode(self.PREVIOUS, rows[0])
+            if has_previous and rows else None
+        )
+        page.has_cursors = bool(page.next_cursor or page.previous_cursor)
+        return page
+
+    def sort_key(self, obj):
+        return tuple(getattr(obj, name) for name in self.fields)
+
+    def encode(self, direction, obj):
+        values = [
+            self._field(name).value_to_string(obj) for name in self.fields
+        ]
+        raw = json.dumps([direction, values], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode(self, cursor):
+        if not cursor:
+            return self.NEXT, None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if (direction not in (self.NEXT, self.PREVIOUS)
+                    or len(values) != len(self.fields)):
+                raise ValueError(cursor)
+            values = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            return self.NEXT, None
+        if any(value is None for value in values):
+            return self.NEXT, None
+        return direction, values
+
+    def _field(self, name):
+        return self.object_list.model._meta.get_field(name)
+
+    def _keyset_filter(self, values, backwards):
+        """
+        Строит условие (a, b) < (x, y) в виде
+        a < x OR (a = x AND b < y) с учетом направления сортировки.
+        """
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            descending = name.startswith("-") != backwards
+            lookup = "lt" if descending else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который считает строки не дальше count_limit:
+    COUNT(*) по подзапросу с LIMIT не читает всю таблицу.
+    Если строк больше, доступны только первые count_limit.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list.order_by().values("pk")[
+            :self.count_limit
+        ].count()
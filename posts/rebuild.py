@@ -0,0 +1,26 @@
+"""
+Пересчет денормализованных данных после массовой загрузки.
+
+bulk_create не вызывает сигналы, поэтому счетчики комментариев
+и авторов, ленты подписок и поисковый индекс строятся заново.
+"""
+from django.core.cache import cache
+
+from . import search
+from .models import AuthorStats, Follow, Post
+from .timeline import backfill
+
+
+def rebuild_denormalized(log=None):
+    log = log or (lambda message: None)
+    Post.objects.recount_comments()
+    AuthorStats.objects.recount()
+    log("Пересчитаны счетчики")
+    for user_id, author_id in Follow.objects.values_list(
+        "user_id", "author_id"
+    ).iterator():
+        backfill(user_id, author_id)
+    log("Заполнены ленты подписок")
+    search.get_backend().rebuild()
+    log("Перестроен поисковый индекс")
+    cache.clear()
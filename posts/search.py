@@ -0,0 +1,160 @@
+"""
+Полнотекстовый поиск по постам.
+
+На SQLite с FTS5 индекс хранится в виртуальной таблице posts_post_search
+(rowid равен id поста), результаты ранжируются по bm25. На других БД
+используется инвертированный индекс в модели PostTerm, результаты
+ранжируются по числу вхождений слов запроса. Индекс обновляется
+сигналами при сохранении и удалении постов, поэтому поиск не
+просматривает таблицу постов целиком.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connection, models
+
+from .models import Post, PostTerm
+
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 10
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+    ]
+
+
+class FTS5Backend:
+    table = "posts_post_search"
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {self.table} (rowid, text) "
+                f"VALUES (%s, %s)",
+                [post.pk, post.text],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [post_id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, text) "
+                f"SELECT id, text FROM {Post._meta.db_table}"
+            )
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s",
+                [self.match(terms)],
+            )
+            return cursor.fetchone()[0]
+
+    def post_ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} "
+                f"WHERE {self.table} MATCH %s "
+                f"ORDER BY rank, rowid DESC LIMIT %s OFFSET %s",
+                [self.match(terms), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def match(self, terms):
+        # Каждое слово ищется как префикс, кавычки экранируют синтаксис
+        # запросов FTS5.
+        return " ".join(f'"{term}"*' for term in terms)
+
+
+class InvertedIndexBackend:
+    def index_post(self, post):
+        PostTerm.objects.filter(post_id=post.pk).delete()
+        PostTerm.objects.bulk_create(
+            PostTerm(post_id=post.pk, term=term, count=count)
+            for term, count in Counter(tokenize(post.text)).items()
+        )
+
+    def remove_post(self, post_id):
+        PostTerm.objects.filter(post_id=post_id).delete()
+
+    def rebuild(self):
+        PostTerm.objects.all().delete()
+        for post in Post.objects.only("pk", "text").iterator():
+            self.index_post(post)
+
+    def count(self, terms):
+        return self.matches(terms).count()
+
+    def post_ids(self, terms, offset, limit):
+        matches = self.matches(terms).order_by("-score", "-post_id")
+        return list(
+            matches[offset:offset + limit].values_list("post_id", flat=True)
+        )
+
+    def matches(self, terms):
+        return PostTerm.objects.filter(term__in=terms).values(
+            "post_id"
+        ).annotate(
+            matched=models.Count("id"),
+            score=models.Sum("count"),
+        ).filter(matched=len(terms))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    if (connection.vendor == "sqlite"
+            and FTS5Backend.table in connection.introspection.table_names()):
+        return FTS5Backend()
+    return InvertedIndexBackend()
+
+
+class SearchResults:
+    """
+    Результаты поиска в порядке релевантности. Срезы запрашивают
+    у индекса только нужную страницу, поэтому объект можно передать
+    в django.core.paginator.Paginator.
+    """
+
+    def __init__(self, query, backend=None):
+        self.terms = sorted(set(tokenize(query)))[:MAX_QUERY_TERMS]
+        self.backend = backend or get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def post_ids(self, offset, limit):
+        if not self.terms:
+            return []
+        return self.backend.post_ids(self.terms, offset, limit)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        if stop <= start:
+            return []
+        post_ids = self.post_ids(start, stop - start)
+        posts = Post.objects.select_related("author", "group").in_bulk(
+            post_ids
+        )
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -1,4 +1,38 @@
 # Posts number per page for pagination.
 POSTS_PER_PAGE = 10
-# Time period in seconds for a page in cache.
-CACHED_TIME_INDEX = 3
+# Time period in seconds for an anonymous feed page in cache.
+# Pages are invalidated by generation counters, so it can be long.
+FEED_CACHE_TIME = 60 * 60 * 24
+# Time period in seconds after which a cached page is rebuilt
+# in the background even if nothing has changed.
+FEED_CACHE_FRESH_TIME = 60 * 5
+# Time period in seconds a request may spend rebuilding a page
+# while others are served the stale copy.
+FEED_CACHE_LOCK_TIME = 10
+# Authors with more followers than this are not fanned out to follower
+# timelines: their posts are merged into the follow feed on read.
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+# Time period in seconds for the cached set of such authors.
+TIMELINE_CELEBRITIES_CACHE_TIME = 60 * 5
+# Batch size for timeline inserts.
+TIMELINE_BATCH_SIZE = 500
+# Comments rendered with a post; the rest are loaded page by page.
+COMMENTS_PER_PAGE = 20
+# Time period in seconds for a rendered post card in cache.
+# Cards are keyed on Post.modified, so edits invalidate them immediately.
+POST_ITEM_CACHE_TIME = 60 * 60 * 24
+# Geometry of thumbnails prepared after an image upload.
+POST_THUMBNAIL_GEOMETRY = "760x539"
+# Widths of responsive post image variants (srcset) and quality of their
+# WebP copies.
+POST_THUMBNAIL_WIDTHS = (360, 540, 760)
+POST_THUMBNAIL_WEBP_QUALITY = 80
+AVATAR_THUMBNAIL_GEOMETRY = "250x250"
+AVATAR_SMALL_THUMBNAIL_GEOMETRY = "100x100"
+# Admin changelists count rows only up to this limit instead of COUNT(*)
+# over the whole table.
+ADMIN_COUNT_LIMIT = 10000
+# Maximum number of best matching posts returned by the admin search.
+# The ids are passed as query parameters, and SQLite builds before 3.32
+# allow at most 999 of them.
+ADMIN_SEARCH_LIMIT = 500
@@ -0,0 +1,242 @@
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import Profile
+
+from . import search
+from .cache import ALL_SCOPE, bump_generations, bump_post_pages
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+from .tasks import backfill_timeline, fan_out_post, trim_timeline
+from .thumbnails import (generate_post_thumbnail,
+                         generate_profile_thumbnails)
+
+
+def loaded_value(instance, attname):
+    """
+    Значение поля при загрузке объекта; для отложенных (defer/only)
+    полей - None, чтобы post_init не делал лишних запросов.
+    """
+    if attname in instance.get_deferred_fields():
+        return None
+    return getattr(instance, attname)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, **kwargs):
+    """
+    Запоминает пост, к которому комментарий относился до сохранения:
+    в админке комментарий можно перенести на другой пост.
+    """
+    instance._previous_post_id = None
+    if instance.pk is not None:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list("post_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F("comments_count") + 1,
+            modified=timezone.now(),
+        )
+        return
+    previous_post_id = getattr(instance, "_previous_post_id", None)
+    if previous_post_id not in (None, instance.post_id):
+        Post.objects.filter(
+            pk__in=(previous_post_id, instance.post_id)
+        ).recount_comments()
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    Post.objects.filter(
+        pk=instance.post_id,
+        comments_count__gt=0,
+    ).update(
+        comments_count=F("comments_count") - 1,
+        modified=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Group)
+def touch_group_posts_on_save(sender, instance, created, **kwargs):
+    if not created:
+        Post.objects.filter(group=instance).touch()
+
+
+@receiver(pre_delete, sender=Group)
+def touch_group_posts_on_delete(sender, instance, **kwargs):
+    Post.objects.filter(group=instance).touch()
+
+
+@receiver(post_save, sender=Post)
+def schedule_fan_out(sender, instance, created, **kwargs):
+    if created:
+        fan_out_post.delay(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, **kwargs):
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    search.get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_author(sender, instance, **kwargs):
+    instance._loaded_author_id = loaded_value(instance, "author_id")
+
+
+@receiver(post_save, sender=Post)
+def update_posts_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.change(instance.author_id, posts_count=1)
+    elif instance._loaded_author_id not in (None, instance.author_id):
+        AuthorStats.change(instance._loaded_author_id, posts_count=-1)
+        AuthorStats.change(instance.author_id, posts_count=1)
+    instance._loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Post)
+def update_posts_count_on_delete(sender, instance, **kwargs):
+    AuthorStats.change(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def update_follow_counts_on_save(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.change(instance.author_id, followers_count=1)
+        AuthorStats.change(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def update_follow_counts_on_delete(sender, instance, **kwargs):
+    AuthorStats.change(instance.author_id, followers_count=-1)
+    AuthorStats.change(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def schedule_backfill(sender, instance, created, **kwargs):
+    if created:
+        backfill_timeline.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def schedule_trim(sender, instance, **kwargs):
+    trim_timeline.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._loaded_group_id = loaded_value(instance, "group_id")
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_generations(sender, instance, **kwargs):
+    group_ids = {instance.group_id, instance._loaded_group_id} - {None}
+    group_slugs = Group.objects.filter(
+        pk__in=group_ids
+    ).values_list("slug", flat=True) if group_ids else ()
+    bump_post_pages(instance.author.username, group_slugs)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_generations(sender, instance, **kwargs):
+    post_ids = {instance.post_id, getattr(instance, "_previous_post_id", None)}
+    posts = Post.objects.filter(pk__in=post_ids - {None})
+    for username, slug in posts.values_list("author__username",
+                                            "group__slug"):
+        bump_post_pages(username, [slug])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_generations(sender, instance, **kwargs):
+    bump_generations(ALL_SCOPE)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_generations(sender, instance, **kwargs):
+    usernames = User.objects.filter(
+        pk__in=(instance.user_id, instance.author_id)
+    ).values_list("username", flat=True)
+    bump_generations(*(f"profile:{username}" for username in usernames))
+
+
+@receiver(post_save, sender=Profile)
+def bump_profile_generations(sender, instance, **kwargs):
+    if instance.user_id is not None:
+        bump_generations(f"profile:{instance.user.username}")
+
+
+@receiver(post_save, sender=User)
+def bump_user_generations(sender, instance, created, update_fields,
+                          **kwargs):
+    # Вход пользователя обновляет только last_login.
+    if created or update_fields == frozenset(("last_login",)):
+        return
+    bump_generations(ALL_SCOPE)
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Profile)
+def remember_image(sender, instance, **kwargs):
+    image = loaded_value(instance, "image")
+    instance._loaded_image_name = image.name if image is not None else None
+
+
+def image_changed(instance):
+    return instance.image.name != instance._loaded_image_name
+
+
+@receiver(pre_save, sender=Post)
+def reset_post_thumbnail(sender, instance, **kwargs):
+    if image_changed(instance):
+        instance.thumbnail_url = ""
+        instance.thumbnail_srcset = ""
+        instance.thumbnail_webp_srcset = ""
+
+
+@receiver(pre_save, sender=Profile)
+def reset_profile_thumbnails(sender, instance, **kwargs):
+    if image_changed(instance):
+        instance.thumbnail_url = ""
+        instance.thumbnail_small_url = ""
+
+
+# Миниатюры нового изображения готовятся фоновой задачей,
+# до этого шаблоны показывают исходное изображение.
+@receiver(post_save, sender=Post)
+def schedule_post_thumbnail(sender, instance, **kwargs):
+    if image_changed(instance):
+        instance._loaded_image_name = instance.image.name
+        if instance.image:
+            generate_post_thumbnail.delay(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def schedule_profile_thumbnails(sender, instance, **kwargs):
+    if image_changed(instance):
+        instance._loaded_image_name = instance.image.name
+        if instance.image:
+            generate_profile_thumbnails.delay(instance.pk)
@@ -0,0 +1,35 @@
+"""
+Фоновые задачи раскладки постов по лентам подписок.
+
+Задачи получают id и проверяют текущее состояние: к моменту выполнения
+пост могли удалить, а подписку - отменить или оформить заново.
+"""
+from tasks.queue import task
+
+from . import timeline
+from .models import Follow, Post
+
+
+@task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task
+def backfill_timeline(user_id, author_id):
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.backfill(user_id, author_id)
+
+
+@task
+def backfill_followers(author_id):
+    timeline.backfill_followers(author_id)
+
+
+@task
+def trim_timeline(user_id, author_id):
+    if not Follow.objects.filter(user_id=user_id,
+                                 author_id=author_id).exists():
+        timeline.trim(user_id, author_id)
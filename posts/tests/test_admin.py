@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+POST_CHANGELIST_URL = reverse("admin:posts_post_changelist")
+COMMENT_CHANGELIST_URL = reverse("admin:posts_comment_changelist")
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            "admin", "admin@example.io", "admin"
+        )
+        group = Group.objects.create(title="Группа", slug="group")
+        for number in range(5):
+            post = Post.objects.create(author=cls.admin, group=group,
+                                       text=f"Запись номер {number}")
+            Comment.objects.create(post=post, author=cls.admin,
+                                   text="Комментарий")
+        Post.objects.create(author=cls.admin, text="Особенная запись")
+        cls.client_admin = Client()
+        cls.client_admin.force_login(cls.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Строки списка загружаются вместе со связанными объектами."""
+        for url in (POST_CHANGELIST_URL, COMMENT_CHANGELIST_URL):
+            with self.subTest(url=url):
+                # Сессия, пользователь, счетчик, строки
+                # и два запроса иерархии дат.
+                with self.assertNumQueries(6):
+                    response = self.client_admin.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_count_is_limited(self):
+        """Число строк считается только до ADMIN_COUNT_LIMIT."""
+        with mock.patch("posts.admin.AdminPaginator.count_limit", 3):
+            response = self.client_admin.get(POST_CHANGELIST_URL)
+        self.assertEqual(response.context["cl"].result_count, 3)
+
+    def test_search_uses_index(self):
+        """Поиск в админке находит записи через поисковый индекс."""
+        response = self.client_admin.get(POST_CHANGELIST_URL,
+                                         {"q": "особенная"})
+        self.assertEqual(
+            [post.text for post in response.context["cl"].result_list],
+            ["Особенная запись"],
+        )
+
+    def test_search_fits_query_parameters_limit(self):
+        """Поиск не передает больше id, чем допускает БД."""
+        with mock.patch("posts.admin.connection.features.max_query_params",
+                        2):
+            response = self.client_admin.get(POST_CHANGELIST_URL,
+                                             {"q": "запись"})
+        self.assertEqual(len(response.context["cl"].result_list), 2)
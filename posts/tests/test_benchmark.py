@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+
+from posts import benchmark
+from posts.models import AuthorStats, Comment, Post, TimelineEntry
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.generate(users=10, groups=2, posts=30, comments=40,
+                           follows=20)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_fills_denormalized_data(self):
+        """Генератор создает данные и пересчитывает счетчики и ленты."""
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(
+            sum(Post.objects.values_list("comments_count", flat=True)),
+            Comment.objects.count(),
+        )
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list("posts_count", flat=True)),
+            30,
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_run_reports_metrics_and_rolls_back_writes(self):
+        """Замер возвращает метрики сценариев и откатывает записи."""
+        report = benchmark.run(requests=3)
+        self.assertEqual(
+            set(report), {scenario.name for scenario in benchmark.SCENARIOS}
+        )
+        for metrics in report.values():
+            self.assertLessEqual(metrics["p50_ms"], metrics["p99_ms"])
+            self.assertGreater(metrics["rps"], 0)
+        self.assertEqual(Post.objects.count(), 30)
+
+    def test_command_detects_query_regressions(self):
+        """Рост числа запросов относительно базового отчета - регрессия."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            call_command("run_benchmark", "--requests", "2",
+                         "--save-baseline", path, stdout=StringIO())
+            with open(path) as file:
+                baseline = json.load(file)
+            for metrics in baseline["scenarios"].values():
+                metrics["max_queries"] -= 1
+            with open(path, "w") as file:
+                json.dump(baseline, file)
+            with self.assertRaises(CommandError):
+                call_command("run_benchmark", "--requests", "2",
+                             "--baseline", path, stdout=StringIO())
+
+
+class WriteBenchmarkTests(TransactionTestCase):
+    def test_concurrent_writes_are_measured_and_removed(self):
+        """Замер записи считает запросы всех потоков и удаляет записи."""
+        benchmark.generate(users=4, groups=1, posts=5, comments=0,
+                           follows=0)
+        report = benchmark.run_writes(threads=2, writes=3)
+        self.assertEqual(report["writes"], 6)
+        self.assertGreater(report["writes_per_s"], 0)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertFalse(Comment.objects.exists())
+
+
+class SlowClientBenchmarkTests(TransactionTestCase):
+    def test_slow_clients_are_served_in_both_modes(self):
+        """Медленные клиенты обслуживаются через WSGI и ASGI без ошибок."""
+        benchmark.generate(users=2, groups=1, posts=3, comments=0,
+                           follows=0)
+        report = benchmark.run_slow_clients(clients=3, threads=2, delay=0,
+                                            upload_size=1024)
+        for mode in ("wsgi", "asgi"):
+            with self.subTest(mode=mode):
+                self.assertEqual(report[mode]["requests"], 9)
+                self.assertEqual(report[mode]["errors"], 0)
+        self.assertEqual(Post.objects.count(), 3)
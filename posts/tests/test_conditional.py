@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Follow, Group, Post, User
+from yatube.testing import QueryBudgetMixin
+
+
+@override_settings(TASKS_EAGER=False)
+class ConditionalPageTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        "not_modified": 0,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        cls.post = Post.objects.create(author=cls.author, text="Запись",
+                                       group=cls.group)
+        cls.urls = [
+            reverse("index"),
+            reverse("group_posts", args=["group"]),
+            reverse("profile", args=["author"]),
+            reverse("post", args=["author", cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_not_modified_by_etag(self):
+        """Страница с прежним ETag отдается как 304 без запросов к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = Client().get(url)["ETag"]
+                response = self.assertQueryBudget(
+                    "not_modified",
+                    lambda: Client().get(url, HTTP_IF_NONE_MATCH=etag),
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_no_last_modified(self):
+        """Страницы не отдают Last-Modified и не отвечают 304 по дате."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = Client().get(url,
+                                        HTTP_IF_MODIFIED_SINCE=http_date())
+                self.assertFalse(response.has_header("Last-Modified"))
+                self.assertEqual(response.status_code, 200)
+
+    def test_deleting_newest_post_changes_validators(self):
+        """Удаление последнего поста обновляет ETag лент."""
+        etags = [Client().get(url)["ETag"] for url in self.urls[:3]]
+        self.post.delete()
+        for url, etag in zip(self.urls[:3], etags):
+            with self.subTest(url=url):
+                response = Client().get(url, HTTP_IF_NONE_MATCH=etag,
+                                        HTTP_IF_MODIFIED_SINCE=http_date())
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, "Запись")
+
+    def test_follow_changes_profile_page(self):
+        """Подписка обновляет ETag страниц автора."""
+        client = Client()
+        client.force_login(self.reader)
+        etags = {url: client.get(url)["ETag"] for url in self.urls[2:]}
+        Follow.objects.create(user=self.reader, author=self.author)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag,
+                                      HTTP_IF_MODIFIED_SINCE=http_date())
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Отписаться")
+
+    def test_new_post_changes_validators(self):
+        """Новый пост обновляет ETag лент, в которых показан."""
+        etags = [Client().get(url)["ETag"] for url in self.urls[:3]]
+        Post.objects.create(author=self.author, text="Новая",
+                            group=self.group)
+        for url, etag in zip(self.urls[:3], etags):
+            with self.subTest(url=url):
+                response = Client().get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Новая")
+
+    def test_comment_changes_post_page(self):
+        """Комментарий обновляет ETag страницы поста."""
+        url = self.urls[3]
+        response = Client().get(url)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text="Комментарий")
+        response = Client().get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Комментарий")
+
+    def test_etag_depends_on_user(self):
+        """Вошедший пользователь не получает 304 по ETag гостя."""
+        url = self.urls[2]
+        etag = Client().get(url)["ETag"]
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
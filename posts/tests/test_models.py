@@ -1,6 +1,12 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-from posts.models import Comment, Group, Post, User
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
 
 
 class PostModelTests(TestCase):
@@ -120,3 +126,124 @@ class CommentModelTests(TestCase):
                 self.assertEqual(
                     comment._meta.get_field(value).help_text, expected
                 )
+
+
+class PostCommentsCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text="Первый пост")
+        cls.post_other = Post.objects.create(author=cls.user, text="Второй")
+
+    def comments_count(self, post):
+        return Post.objects.get(pk=post.pk).comments_count
+
+    def test_comments_count_follows_comments(self):
+        """comments_count меняется при добавлении и удалении комментария."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text="Комментарий"
+        )
+        Comment.objects.create(
+            post=self.post, author=self.user, text="Еще комментарий"
+        )
+        self.assertEqual(self.comments_count(self.post), 2)
+        comment.delete()
+        self.assertEqual(self.comments_count(self.post), 1)
+
+    def test_comments_count_follows_moved_comment(self):
+        """comments_count пересчитывается при переносе комментария."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text="Комментарий"
+        )
+        comment.post = self.post_other
+        comment.save()
+        self.assertEqual(self.comments_count(self.post), 0)
+        self.assertEqual(self.comments_count(self.post_other), 1)
+
+    def test_recount_comments_command(self):
+        """Команда recount_comments восстанавливает comments_count."""
+        Comment.objects.create(
+            post=self.post, author=self.user, text="Комментарий"
+        )
+        Post.objects.update(comments_count=42)
+        call_command("recount_comments", stdout=StringIO())
+        self.assertEqual(self.comments_count(self.post), 1)
+        self.assertEqual(self.comments_count(self.post_other), 0)
+
+
+class FollowModelTests(TestCase):
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора запрещена на уровне БД."""
+        user = User.objects.create_user(username="TestUser")
+        author = User.objects.create_user(username="TestAuthor")
+        Follow.objects.create(user=user, author=author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=user, author=author)
+
+    def test_explain_feeds_command(self):
+        """Команда explain_feeds показывает планы запросов лент
+        и не удаляет индексы."""
+        out = StringIO()
+        call_command("explain_feeds", "--repeat", "1", stdout=out)
+        for name in ("index", "group_posts", "profile", "follow_index"):
+            self.assertIn(name, out.getvalue())
+        self.assertIn("post_pub_date_idx", out.getvalue())
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestUser")
+        cls.author = User.objects.create_user(username="TestAuthor")
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_stats_follow_posts_and_follows(self):
+        """Счетчики автора меняются вместе с постами и подписками."""
+        post = Post.objects.create(author=self.author, text="Пост")
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(
+            (self.stats(self.author).posts_count,
+             self.stats(self.author).followers_count,
+             self.stats(self.user).following_count),
+            (1, 1, 1),
+        )
+        post.delete()
+        follow.delete()
+        self.assertEqual(
+            (self.stats(self.author).posts_count,
+             self.stats(self.author).followers_count,
+             self.stats(self.user).following_count),
+            (0, 0, 0),
+        )
+
+    def test_failed_counter_update_rolls_back_post(self):
+        """Пост не сохраняется, если счетчики автора обновить не удалось."""
+        client = Client()
+        client.force_login(self.author)
+        with mock.patch.object(AuthorStats, "change",
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                client.post(reverse("new_post"), {"text": "Пост"})
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+
+    def test_deleting_user_updates_stats_of_others(self):
+        """Удаление пользователя уменьшает счетчики его подписок."""
+        follower = User.objects.create_user(username="Follower")
+        Follow.objects.create(user=follower, author=self.author)
+        follower.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_recount_author_stats_command(self):
+        """Команда recount_author_stats восстанавливает счетчики."""
+        Post.objects.create(author=self.author, text="Пост")
+        Follow.objects.create(user=self.user, author=self.author)
+        AuthorStats.objects.filter(user=self.user).delete()
+        AuthorStats.objects.update(posts_count=42, followers_count=42)
+        call_command("recount_author_stats", stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
@@ -20,6 +20,7 @@ class PostsRoutesTests(TestCase):
             "/new/": reverse("new_post"),
             "/new_group/": reverse("new_group"),
             "/follow/": reverse("follow_index"),
+            "/search/": reverse("search"),
             # Non static URLs
             f"/{user.username}/": reverse("profile", args=[user.username]),
             f"/group/{GROUP_SLUG}/": reverse("group_posts", args=[GROUP_SLUG]),
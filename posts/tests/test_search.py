@@ -0,0 +1,61 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostTerm, User
+from posts.search import (FTS5Backend, InvertedIndexBackend, SearchResults,
+                          get_backend)
+from posts.settings import POSTS_PER_PAGE
+
+
+SEARCH_URL = reverse("search")
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+
+    def search(self, query, **params):
+        response = Client().get(SEARCH_URL, {"q": query, **params})
+        return list(response.context["page"])
+
+    def test_backend_is_fts5_on_sqlite(self):
+        """На SQLite поиск использует FTS5."""
+        self.assertIsInstance(get_backend(), FTS5Backend)
+
+    def test_search_follows_new_and_edited_posts(self):
+        """Индекс обновляется при создании, правке и удалении поста."""
+        post = Post.objects.create(author=self.user, text="Летний закат")
+        self.assertEqual(self.search("закат"), [post])
+        post.text = "Зимний рассвет"
+        post.save()
+        self.assertEqual(self.search("закат"), [])
+        self.assertEqual(self.search("рассвет"), [post])
+        post.delete()
+        self.assertEqual(self.search("рассвет"), [])
+
+    def test_results_are_ranked_and_paginated(self):
+        """Все слова запроса обязательны, результаты ранжированы."""
+        Post.objects.create(author=self.user, text="кот")
+        best = Post.objects.create(author=self.user,
+                                   text="кот и пес, пес и кот, кот")
+        for number in range(POSTS_PER_PAGE):
+            Post.objects.create(author=self.user, text=f"кот пес {number}")
+        results = self.search("кот пес")
+        self.assertEqual(len(results), POSTS_PER_PAGE)
+        self.assertEqual(results[0], best)
+        self.assertEqual(len(self.search("кот пес", page=2)), 1)
+
+    def test_inverted_index_backend(self):
+        """Запасной инвертированный индекс ищет и ранжирует посты."""
+        backend = InvertedIndexBackend()
+        once = Post.objects.create(author=self.user, text="Река и лес")
+        twice = Post.objects.create(author=self.user, text="Река, река и лес")
+        Post.objects.create(author=self.user, text="Только лес")
+        backend.rebuild()
+        self.assertEqual(list(SearchResults("река лес", backend)),
+                         [twice, once])
+        backend.remove_post(twice.pk)
+        self.assertFalse(PostTerm.objects.filter(post=twice).exists())
+        self.assertEqual(list(SearchResults("РЕКА", backend)), [once])
@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.settings import POST_THUMBNAIL_WIDTHS
+from posts.thumbnails import (generate_post_thumbnail,
+                              generate_profile_thumbnails)
+from tasks.queue import run_pending
+from users.models import Profile
+
+
+INDEX_URL = reverse("index")
+
+SMALL_GIF_CONTENT = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                     b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                     b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                     b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                     b'\x0A\x00\x3B')
+
+
+def make_image(name):
+    return SimpleUploadedFile(name, content=SMALL_GIF_CONTENT,
+                              content_type="image/gif")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR),
+                   TASKS_EAGER=False)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_thumbnail_is_scheduled_only_for_new_image(self):
+        """Миниатюра готовится при загрузке изображения, а не при правке."""
+        with mock.patch("posts.signals.generate_post_thumbnail") as task:
+            post = Post.objects.create(author=self.user, text="Текст",
+                                       image=make_image("first.gif"))
+            task.delay.assert_called_once_with(post.pk)
+            task.delay.reset_mock()
+            post.text = "Новый текст"
+            post.save()
+            task.delay.assert_not_called()
+            post.image = make_image("second.gif")
+            post.save()
+            task.delay.assert_called_once_with(post.pk)
+
+    def test_post_thumbnail_replaces_original_image(self):
+        """До готовности миниатюры показывается исходное изображение."""
+        post = Post.objects.create(author=self.user, text="Текст",
+                                   image=make_image("post.gif"))
+        response = Client().get(INDEX_URL)
+        self.assertContains(response, post.image.url)
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_url)
+        response = Client().get(INDEX_URL)
+        self.assertContains(response, post.thumbnail_url)
+
+    def test_post_thumbnail_variants(self):
+        """Для поста готовятся варианты нескольких ширин и WebP."""
+        post = Post.objects.create(author=self.user, text="Текст",
+                                   image=make_image("variants.gif"))
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        webp_sources = post.thumbnail_webp_srcset.split(", ")
+        self.assertEqual(len(webp_sources), len(POST_THUMBNAIL_WIDTHS))
+        for source, width in zip(webp_sources, POST_THUMBNAIL_WIDTHS):
+            url, descriptor = source.split()
+            self.assertTrue(url.endswith(".webp"))
+            self.assertEqual(descriptor, f"{width}w")
+        response = Client().get(INDEX_URL)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, post.thumbnail_srcset)
+
+    def test_worker_prepares_thumbnail(self):
+        """Миниатюру готовит рабочий процесс очереди задач."""
+        post = Post.objects.create(author=self.user, text="Текст",
+                                   image=make_image("queued.gif"))
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, "")
+        run_pending()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_url)
+
+    def test_changed_image_resets_thumbnail(self):
+        """Смена изображения сбрасывает устаревшую миниатюру."""
+        post = Post.objects.create(author=self.user, text="Текст",
+                                   image=make_image("old.gif"))
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        post.image = make_image("new.gif")
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, "")
+        self.assertEqual(post.thumbnail_webp_srcset, "")
+
+    def test_profile_thumbnails(self):
+        """Для аватара готовятся обе миниатюры."""
+        profile = Profile.objects.create(user=self.user,
+                                         image=make_image("avatar.gif"))
+        generate_profile_thumbnails(profile.pk)
+        profile.refresh_from_db()
+        self.assertTrue(profile.thumbnail_url)
+        self.assertTrue(profile.thumbnail_small_url)
+        self.assertNotEqual(profile.thumbnail_url,
+                            profile.thumbnail_small_url)
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import AuthorStats, Follow, Post, TimelineEntry, User
+from posts.settings import POSTS_PER_PAGE
+from posts.timeline import get_celebrities
+from tasks.queue import run_pending
+
+
+FOLLOW_INDEX_URL = reverse("follow_index")
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.star = User.objects.create_user(username="Star")
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика при публикации."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text="Новый пост")
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_follow_backfills_and_unfollow_trims_timeline(self):
+        """Подписка добавляет старые посты автора, отписка их убирает."""
+        post = Post.objects.create(author=self.author, text="Старый пост")
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    @mock.patch("posts.timeline.TIMELINE_FANOUT_MAX_FOLLOWERS", 1)
+    def test_celebrity_posts_are_merged_on_read(self):
+        """Посты авторов с большим числом подписчиков не раскладываются
+        по лентам, а подмешиваются в ленту при чтении."""
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.author, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        for i in range(POSTS_PER_PAGE):
+            Post.objects.create(author=self.star, text=f"Звезда {i}")
+        for i in range(3):
+            Post.objects.create(author=self.author, text=f"Автор {i}")
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=self.star).exists()
+        )
+
+        first_page = self.client_reader.get(FOLLOW_INDEX_URL).context["page"]
+        second_page = self.client_reader.get(
+            FOLLOW_INDEX_URL, {"cursor": first_page.next_cursor}
+        ).context["page"]
+        shown = list(first_page) + list(second_page)
+        self.assertEqual(
+            shown, list(Post.objects.order_by("-pub_date", "-id"))
+        )
+        self.assertIsNone(second_page.next_cursor)
+
+    @mock.patch("posts.timeline.TIMELINE_FANOUT_MAX_FOLLOWERS", 1)
+    @override_settings(TASKS_EAGER=False)
+    def test_former_celebrity_is_backfilled(self):
+        """Автор, переставший быть знаменитостью, раскладывается по лентам
+        фоновой задачей, даже если кэш множества потерян."""
+        Follow.objects.create(user=self.reader, author=self.star)
+        follow = Follow.objects.create(user=self.author, author=self.star)
+        run_pending()
+        cache.clear()
+        self.assertEqual(get_celebrities(), {self.star.pk})
+        post = Post.objects.create(author=self.star, text="Звезда")
+        run_pending()
+        follow.delete()
+        run_pending()
+        cache.clear()
+        self.assertEqual(get_celebrities(), set())
+        self.assertTrue(AuthorStats.objects.get(user=self.star).fanned_out)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        run_pending()
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
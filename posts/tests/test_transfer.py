@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import transfer
+from posts.models import (AuthorStats, Comment, Follow, Group, Post,
+                          TimelineEntry, User)
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.author = User.objects.create_user(username="author")
+        self.reader = User.objects.create_user(username="reader")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.posts = [
+            Post.objects.create(text=f"Пост {number}", author=self.author,
+                                group=self.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(post=self.posts[0], author=self.reader,
+                               text="Комментарий")
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def _clear(self):
+        Follow.objects.all().delete()
+        Comment.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    def _round_trip(self, data_format):
+        dates = dict(Post.objects.values_list("pk", "pub_date"))
+        call_command("export_data", self.directory, format=data_format,
+                     batch_size=2, stdout=StringIO())
+        self._clear()
+        call_command("import_data", self.directory, format=data_format,
+                     batch_size=2, stdout=StringIO())
+        self.assertEqual(dict(Post.objects.values_list("pk", "pub_date")),
+                         dates)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertTrue(Follow.objects.filter(
+            user__username="reader", author__username="author"
+        ).exists())
+        self.assertEqual(
+            Post.objects.filter(group__slug="group").count(), 2
+        )
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка и загрузка JSON Lines сохраняют данные и даты."""
+        self._round_trip("jsonl")
+
+    def test_csv_round_trip(self):
+        """Выгрузка и загрузка CSV сохраняют данные и даты."""
+        self._round_trip("csv")
+
+    def test_import_rebuilds_denormalized_data(self):
+        """После загрузки пересчитываются счетчики и ленты."""
+        call_command("export_data", self.directory, stdout=StringIO())
+        self._clear()
+        call_command("import_data", self.directory, stdout=StringIO())
+        stats = AuthorStats.objects.get(user__username="author")
+        self.assertEqual(stats.posts_count, 5)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[0].pk).comments_count, 1
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username="reader").count(), 5
+        )
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, transfer.PROGRESS_FILE)
+        ))
+
+    def test_resume_skips_loaded_rows(self):
+        """С --resume загрузка продолжается с сохраненной строки."""
+        call_command("export_data", self.directory, kinds=["posts"],
+                     stdout=StringIO())
+        Post.objects.all().delete()
+        transfer.save_checkpoints(self.directory, {"posts": 3})
+        call_command("import_data", self.directory, kinds=["posts"],
+                     resume=True, no_rebuild=True, stdout=StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list("pk", flat=True)),
+            [post.pk for post in self.posts[3:]],
+        )
+
+    def test_progress_is_saved_after_each_batch(self):
+        """Прогресс загрузки записывается после каждой пачки."""
+        call_command("export_data", self.directory, kinds=["posts"],
+                     stdout=StringIO())
+        saved = []
+        transfer.import_kind(
+            self.directory, "posts", "jsonl", 2, 0, lambda count: None,
+            saved.append,
+        )
+        self.assertEqual(saved, [2, 4, 5])
+        with open(transfer.data_path(self.directory, "posts", "jsonl")) as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 5)
@@ -1,14 +1,19 @@
+import hashlib
 import shutil
 import tempfile
+import warnings
+from unittest import mock
 
 from django.conf import settings
 from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post, User
-from posts.settings import POSTS_PER_PAGE
+from posts.cache import LOCK_KEY
+from posts.models import Comment, Follow, Group, Post, User
+from posts.settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
 
 
 USER_NAME = "TestUser"
@@ -116,18 +121,66 @@ class PostsPagesTests(TestCase):
                 )
 
     def test_page_index_cache_works_as_expected(self):
-        """Шаблон 'index' кэширован."""
+        """Шаблон 'index' кэширован для гостя
+        и сбрасывается при появлении нового поста."""
+        cache.clear()
         response_cached = self.guest_client.get(INDEX_URL)
-        Post.objects.create(text="Пост отсутствует в кэше", author=self.user)
+        Post.objects.filter(pk=self.post.pk).update(text="Тихая правка")
         self.assertEqual(
             response_cached.content,
             self.guest_client.get(INDEX_URL).content
         )
+        Post.objects.create(text="Новый пост", author=self.user)
+        self.assertContains(self.guest_client.get(INDEX_URL), "Новый пост")
+
+    def test_page_cache_serves_stale_page_while_rebuilding(self):
+        """Пока другой запрос строит страницу заново,
+        гость получает устаревшую копию из кэша."""
         cache.clear()
-        self.assertNotEqual(
+        response_cached = self.guest_client.get(INDEX_URL)
+        Post.objects.create(text="Новый пост", author=self.user)
+        digest = hashlib.md5(INDEX_URL.encode()).hexdigest()
+        cache.add(LOCK_KEY.format(digest), True)
+        self.assertEqual(
             response_cached.content,
             self.guest_client.get(INDEX_URL).content
         )
+        cache.delete(LOCK_KEY.format(digest))
+        self.assertContains(self.guest_client.get(INDEX_URL), "Новый пост")
+
+    @mock.patch("posts.cache.FEED_CACHE_LOCK_TIME", 0.1)
+    def test_page_cache_keeps_lock_of_other_request(self):
+        """Запрос, не дождавшийся чужой сборки страницы, строит ее сам
+        и не снимает чужую блокировку."""
+        cache.clear()
+        digest = hashlib.md5(INDEX_URL.encode()).hexdigest()
+        cache.add(LOCK_KEY.format(digest), "other")
+        self.assertContains(self.guest_client.get(INDEX_URL), self.post.text)
+        self.assertEqual(cache.get(LOCK_KEY.format(digest)), "other")
+
+    def test_page_cache_keys_are_safe_for_memcached(self):
+        """Имя из адреса не попадает в ключ кэша как есть."""
+        url = reverse("profile", args=["имя с пробелом " + "x" * 250])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.guest_client.get(url)
+        self.assertEqual(
+            [warning for warning in caught
+             if issubclass(warning.category, CacheKeyWarning)],
+            [],
+        )
+
+    def test_page_cache_is_not_used_for_authorized_user(self):
+        """Авторизованный пользователь не получает страницу из кэша."""
+        cache.clear()
+        self.guest_client.get(GROUP_URL)
+        Post.objects.filter(pk=self.post.pk).update(text="Тихая правка")
+        Post.objects.filter(pk=self.post.pk).touch()
+        self.assertContains(
+            self.authorized_client.get(GROUP_URL), "Тихая правка"
+        )
+        self.assertNotContains(self.guest_client.get(GROUP_URL),
+                               "Тихая правка")
 
 
 class PaginatorPagesTests(TestCase):
@@ -144,6 +197,9 @@ class PaginatorPagesTests(TestCase):
         cls.REST_POSTS = 7
         cls.guest_client = Client()
 
+    def setUp(self):
+        cache.clear()
+
     def test_index_first_page_contains_number_of_posts(self):
         """Первая страница по адресу "index" содержит POSTS_PER_PAGE постов."""
         cache.clear()
@@ -152,8 +208,33 @@ class PaginatorPagesTests(TestCase):
 
     def test_index_second_page_contains_rest_posts(self):
         """Вторая страница по адресу "index" содержит остальные посты."""
-        response = self.guest_client.get(INDEX_URL + "?page=2")
+        cache.clear()
+        first_page = self.guest_client.get(INDEX_URL).context["page"]
+        response = self.guest_client.get(
+            INDEX_URL, {"cursor": first_page.next_cursor}
+        )
         self.assertEqual(len(response.context["page"]), self.REST_POSTS)
+        self.assertIsNone(response.context["page"].next_cursor)
+        self.assertTrue(set(first_page).isdisjoint(response.context["page"]))
+
+    def test_index_previous_cursor_returns_first_page(self):
+        """Курсор предыдущей страницы возвращает на первую страницу."""
+        cache.clear()
+        first_page = self.guest_client.get(INDEX_URL).context["page"]
+        second_page = self.guest_client.get(
+            INDEX_URL, {"cursor": first_page.next_cursor}
+        ).context["page"]
+        response = self.guest_client.get(
+            INDEX_URL, {"cursor": second_page.previous_cursor}
+        )
+        self.assertEqual(list(response.context["page"]), list(first_page))
+        self.assertIsNone(response.context["page"].previous_cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.guest_client.get(GROUP_URL, {"cursor": "broken"})
+        self.assertEqual(len(response.context["page"]), POSTS_PER_PAGE)
+        self.assertIsNone(response.context["page"].previous_cursor)
 
     def test_group_first_page_contains_number_of_posts(self):
         """Первая страница по адресу группы содержит
@@ -163,7 +244,10 @@ class PaginatorPagesTests(TestCase):
 
     def test_group_second_page_contains_rest_posts(self):
         """Вторая страница по адресу группы содержит остальные посты группы."""
-        response = self.guest_client.get(GROUP_URL + "?page=2")
+        first_page = self.guest_client.get(GROUP_URL).context["page"]
+        response = self.guest_client.get(
+            GROUP_URL, {"cursor": first_page.next_cursor}
+        )
         self.assertEqual(len(response.context["page"]), self.REST_GROUP_POSTS)
 
 
@@ -230,6 +314,14 @@ class FollowsPagesTests(TestCase):
             ).exists()
         )
 
+    def test_author_card_shows_stats_after_follow(self):
+        """Карточка автора показывает счетчики из AuthorStats."""
+        self.authorized_client_leo.get(FOLLOW_URL)
+        response = self.authorized_client_leo.get(PROFILE_URL)
+        self.assertEqual(response.context["author"].stats.followers_count, 1)
+        self.assertContains(response, "Подписчиков: 1")
+        self.assertContains(response, "Записей: 1")
+
     def test_follow_index_follower_sees_author_posts_in_subs_feed(self):
         """Новый пост пользователя появляется в ленте того,
         кто на него подписан."""
@@ -248,3 +340,93 @@ class FollowsPagesTests(TestCase):
         )
         response = self.authorized_client_bob.get(FOLLOW_INDEX_URL)
         self.assertNotIn(self.post_leo, response.context["page"])
+
+
+class PostItemCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER_NAME)
+        cls.group = Group.objects.create(title="Заголовок", slug=GROUP_SLUG)
+        cls.post = Post.objects.create(
+            text="Исходный текст",
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_item_is_cached_until_post_changes(self):
+        """Карточка поста берется из кэша, пока пост не изменился."""
+        self.authorized_client.get(PROFILE_URL)
+        Post.objects.filter(pk=self.post.pk).update(text="Тихая правка")
+        self.assertContains(self.authorized_client.get(PROFILE_URL),
+                            "Исходный текст")
+        Post.objects.filter(pk=self.post.pk).touch()
+        self.assertContains(self.authorized_client.get(PROFILE_URL),
+                            "Тихая правка")
+
+    def test_post_item_cache_invalidated_by_comment_and_group(self):
+        """Новый комментарий и изменение группы сбрасывают кэш карточки."""
+        self.guest_client.get(PROFILE_URL)
+        Comment.objects.create(post=self.post, author=self.user, text="!")
+        self.assertContains(self.guest_client.get(PROFILE_URL),
+                            "Комментариев: 1")
+        self.group.title = "Новый заголовок"
+        self.group.save()
+        self.assertContains(self.guest_client.get(PROFILE_URL),
+                            "#Новый заголовок")
+
+    def test_post_item_user_buttons_are_not_shared(self):
+        """Кнопки пользователя не попадают в общий кэш карточки."""
+        post_edit_url = reverse("post_edit", args=[USER_NAME, self.post.id])
+        self.guest_client.get(PROFILE_URL)
+        self.assertContains(self.authorized_client.get(PROFILE_URL),
+                            post_edit_url)
+        self.assertNotContains(self.guest_client.get(PROFILE_URL),
+                               post_edit_url)
+
+
+class CommentsPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER_NAME)
+        cls.post = Post.objects.create(author=cls.user, text="Обсуждение")
+        for number in range(COMMENTS_PER_PAGE + 2):
+            commenter = User.objects.create_user(username=f"User{number}")
+            Comment.objects.create(post=cls.post, author=commenter,
+                                   text=f"Комментарий {number}")
+        cls.POST_URL = reverse("post", args=[USER_NAME, cls.post.id])
+        cls.COMMENTS_URL = reverse("post_comments",
+                                   args=[USER_NAME, cls.post.id])
+
+    def test_post_shows_first_page_of_comments(self):
+        """Страница поста показывает первые COMMENTS_PER_PAGE
+        комментариев, начиная с новых."""
+        response = self.client.get(self.POST_URL)
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0].text,
+                         f"Комментарий {COMMENTS_PER_PAGE + 1}")
+        self.assertTrue(response.context["comments_cursor"])
+
+    def test_more_comments_are_loaded_by_cursor(self):
+        """Следующие комментарии отдает фрагмент по курсору."""
+        cursor = self.client.get(self.POST_URL).context["comments_cursor"]
+        response = self.client.get(self.COMMENTS_URL, {"cursor": cursor})
+        comments = response.context["comments"]
+        self.assertEqual([comment.text for comment in comments],
+                         ["Комментарий 1", "Комментарий 0"])
+        self.assertIsNone(response.context["comments_cursor"])
+        self.assertNotContains(response, "<html")
+
+    def test_comments_page_link_needs_no_extra_queries(self):
+        """Ссылка на следующую страницу не выбирает автора поста отдельно."""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.COMMENTS_URL)
+        self.assertTrue(response.context["comments_cursor"])
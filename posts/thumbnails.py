@@ -0,0 +1,68 @@
+"""
+Подготовка миниатюр изображений постов и аватаров.
+
+Для постов готовятся варианты нескольких ширин в исходном формате
+и в WebP, браузер выбирает подходящий по srcset.
+
+Функции выполняются фоновыми задачами (tasks.queue) и сохраняют
+адреса готовых миниатюр в модели, только если изображение не сменилось
+за время их подготовки.
+"""
+from django.utils import timezone
+
+from tasks.queue import task
+from users.models import Profile
+from yatube.thumbnails import make_srcset, make_thumbnail_url
+
+from .cache import bump_generations, bump_post_pages
+from .models import Post
+from .settings import (AVATAR_SMALL_THUMBNAIL_GEOMETRY,
+                       AVATAR_THUMBNAIL_GEOMETRY, POST_THUMBNAIL_GEOMETRY,
+                       POST_THUMBNAIL_WEBP_QUALITY, POST_THUMBNAIL_WIDTHS)
+
+
+@task
+def generate_post_thumbnail(post_id):
+    post = Post.objects.select_related("author", "group").filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.image:
+        return
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail_url=make_thumbnail_url(post.image,
+                                         POST_THUMBNAIL_GEOMETRY),
+        thumbnail_srcset=make_srcset(post.image, POST_THUMBNAIL_GEOMETRY,
+                                     POST_THUMBNAIL_WIDTHS),
+        thumbnail_webp_srcset=make_srcset(
+            post.image,
+            POST_THUMBNAIL_GEOMETRY,
+            POST_THUMBNAIL_WIDTHS,
+            format="WEBP",
+            quality=POST_THUMBNAIL_WEBP_QUALITY,
+        ),
+        modified=timezone.now(),
+    )
+    if updated:
+        bump_post_pages(post.author.username,
+                        [post.group.slug if post.group else None])
+
+
+@task
+def generate_profile_thumbnails(profile_id):
+    profile = Profile.objects.select_related("user").filter(
+        pk=profile_id
+    ).first()
+    if profile is None or not profile.image:
+        return
+    updated = Profile.objects.filter(
+        pk=profile_id,
+        image=profile.image.name,
+    ).update(
+        thumbnail_url=make_thumbnail_url(profile.image,
+                                         AVATAR_THUMBNAIL_GEOMETRY),
+        thumbnail_small_url=make_thumbnail_url(
+            profile.image, AVATAR_SMALL_THUMBNAIL_GEOMETRY
+        ),
+    )
+    if updated and profile.user_id is not None:
+        bump_generations(f"profile:{profile.user.username}")
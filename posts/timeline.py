@@ -0,0 +1,145 @@
+"""
+Лента подписок с раскладкой постов по лентам при публикации.
+
+Пост автора копируется в TimelineEntry каждого подписчика (fan-out on
+write), и страница /follow/ читается по индексу (user, pub_date).
+Посты авторов с очень большим числом подписчиков не раскладываются,
+а подмешиваются в ленту при чтении (fan-out on read).
+"""
+import time
+from itertools import islice
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import tasks
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+from .settings import (POSTS_PER_PAGE, TIMELINE_BATCH_SIZE,
+                       TIMELINE_CELEBRITIES_CACHE_TIME,
+                       TIMELINE_FANOUT_MAX_FOLLOWERS)
+
+
+CELEBRITIES_CACHE_KEY = "timeline:celebrities"
+
+
+def get_celebrities():
+    """
+    Возвращает множество id авторов, которые не раскладываются по лентам.
+    Переходы хранятся в AuthorStats.fanned_out: автор, выпавший
+    из множества, раскладывается по лентам своих подписчиков задним
+    числом фоновой задачей.
+    """
+    cached = cache.get(CELEBRITIES_CACHE_KEY)
+    if cached is not None and cached[0] > time.time():
+        return cached[1]
+    rows = AuthorStats.objects.filter(
+        Q(followers_count__gt=TIMELINE_FANOUT_MAX_FOLLOWERS)
+        | Q(fanned_out=False)
+    ).values_list("user_id", "followers_count", "fanned_out")
+    celebrities = set()
+    for user_id, followers_count, fanned_out in rows:
+        if followers_count > TIMELINE_FANOUT_MAX_FOLLOWERS:
+            celebrities.add(user_id)
+            if fanned_out:
+                AuthorStats.objects.filter(pk=user_id).update(
+                    fanned_out=False
+                )
+        # Флаг снимает один процесс, он и ставит задачу.
+        elif AuthorStats.objects.filter(
+            pk=user_id, fanned_out=False
+        ).update(fanned_out=True):
+            tasks.backfill_followers.delay(user_id)
+    cache.set(
+        CELEBRITIES_CACHE_KEY,
+        (time.time() + TIMELINE_CELEBRITIES_CACHE_TIME, celebrities),
+        None,
+    )
+    return celebrities
+
+
+def fan_out(post):
+    """
+    Добавляет новый пост в ленты подписчиков автора.
+    """
+    if post.author_id in get_celebrities():
+        return
+    followers = Follow.objects.filter(author_id=post.author_id)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for user_id in followers.values_list("user_id", flat=True).iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """
+    Добавляет в ленту пользователя все посты автора после подписки.
+    """
+    if author_id in get_celebrities():
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by()
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.values_list("pk", "pub_date").iterator()
+    )
+
+
+def backfill_followers(author_id):
+    """
+    Добавляет все посты автора в ленты его подписчиков.
+    """
+    followers = Follow.objects.filter(author_id=author_id)
+    for user_id in followers.values_list("user_id", flat=True).iterator():
+        backfill(user_id, author_id)
+
+
+def trim(user_id, author_id):
+    """
+    Убирает посты автора из ленты пользователя после отписки.
+    """
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+
+
+def get_timeline_page(user, cursor=None, per_page=POSTS_PER_PAGE):
+    """
+    Возвращает страницу ленты подписок, объединяя разложенные посты
+    с постами подписанных "знаменитостей".
+    """
+    posts = Post.objects.select_related("author", "group")
+    paginator = CursorPaginator(posts, per_page)
+    direction, values = paginator.decode(cursor)
+    entries = TimelineEntry.objects.filter(user=user)
+    entries = entries.select_related("post__author", "post__group")
+    entries_paginator = CursorPaginator(
+        entries, per_page, ordering=("-pub_date", "-post_id")
+    )
+    rows = [entry.post for entry in entries_paginator.fetch(direction, values)]
+    celebrities = get_celebrities()
+    if celebrities:
+        pulled_authors = list(Follow.objects.filter(
+            user=user,
+            author_id__in=celebrities,
+        ).values_list("author_id", flat=True))
+        if pulled_authors:
+            pulled = CursorPaginator(
+                posts.filter(author_id__in=pulled_authors), per_page
+            )
+            rows += pulled.fetch(direction, values)
+            rows = sorted(
+                {post.pk: post for post in rows}.values(),
+                key=paginator.sort_key,
+                reverse=direction == CursorPaginator.NEXT,
+            )
+    return paginator.make_page(rows, direction, values)
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
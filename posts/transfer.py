@@ -0,0 +1,220 @@
+"""
+Потоковые выгрузка и загрузка данных в JSON Lines и CSV.
+
+Каждый вид данных (users, groups, posts, comments, follows) хранится
+в отдельном файле <вид>.jsonl или <вид>.csv с первичными ключами,
+поэтому связи сохраняются. Выгрузка читает таблицы пачками по ключу,
+загрузка читает файл построчно и пишет пачками через bulk_create:
+память не зависит от объема данных. После каждой пачки загрузка
+сохраняет прогресс, и прерванный импорт можно продолжить (--resume);
+уже загруженные строки пропускаются благодаря ignore_conflicts.
+"""
+import csv
+import datetime
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .models import Comment, Follow, Group, Post, User
+
+
+PROGRESS_FILE = ".import-progress.json"
+FORMATS = ("jsonl", "csv")
+
+# Порядок важен: загрузка идет от независимых данных к зависимым.
+KINDS = {
+    "users": (User, ("id", "username", "password", "first_name",
+                     "last_name", "email", "is_active", "is_staff",
+                     "is_superuser", "date_joined", "last_login")),
+    "groups": (Group, ("id", "title", "slug", "description")),
+    "posts": (Post, ("id", "text", "pub_date", "author", "group", "image")),
+    "comments": (Comment, ("id", "post", "author", "text", "created")),
+    "follows": (Follow, ("id", "user", "author")),
+}
+
+
+def data_path(directory, kind, data_format):
+    return os.path.join(directory, f"{kind}.{data_format}")
+
+
+def _columns(model, fields):
+    return [model._meta.get_field(name).attname for name in fields]
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def export_rows(kind, batch_size):
+    """
+    Возвращает строки вида kind, выбирая их пачками по первичному ключу.
+    """
+    model, fields = KINDS[kind]
+    columns = _columns(model, fields)
+    last_pk = None
+    while True:
+        queryset = model._default_manager.order_by("pk")
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        rows = list(queryset.values_list(*columns)[:batch_size])
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(columns, map(_dump_value, row)))
+        last_pk = rows[-1][0]
+
+
+def write_rows(path, data_format, columns, rows, progress):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if data_format == "csv":
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(row):
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        for row in rows:
+            write(row)
+            count += 1
+            progress(count)
+    return count
+
+
+def export_kind(directory, kind, data_format, batch_size, progress):
+    model, fields = KINDS[kind]
+    return write_rows(
+        data_path(directory, kind, data_format),
+        data_format,
+        _columns(model, fields),
+        export_rows(kind, batch_size),
+        progress,
+    )
+
+
+def read_rows(path, data_format):
+    with open(path, newline="", encoding="utf-8") as file:
+        if data_format == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _loader(model, fields):
+    """
+    Возвращает функцию, превращающую строку файла в объект модели.
+    """
+    model_fields = [model._meta.get_field(name) for name in fields]
+
+    def load(row):
+        values = {}
+        for field in model_fields:
+            value = row.get(field.attname)
+            if value in ("", None) and field.null:
+                value = None
+            values[field.attname] = field.to_python(value)
+        return model(**values)
+    return load
+
+
+@contextmanager
+def keep_dates(model):
+    """
+    Отключает auto_now/auto_now_add на время загрузки,
+    чтобы даты из файла не заменялись текущим временем.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def import_kind(directory, kind, data_format, batch_size, skip, progress,
+                checkpoint):
+    """
+    Загружает файл вида kind, пропустив первые skip строк.
+    После каждой пачки вызывает checkpoint(число обработанных строк).
+    """
+    model, fields = KINDS[kind]
+    load = _loader(model, fields)
+    path = data_path(directory, kind, data_format)
+    rows = islice(read_rows(path, data_format), skip, None)
+    done = skip
+    with keep_dates(model):
+        while True:
+            batch = [load(row) for row in islice(rows, batch_size)]
+            if not batch:
+                break
+            with transaction.atomic():
+                model._default_manager.bulk_create(batch,
+                                                   ignore_conflicts=True)
+            done += len(batch)
+            checkpoint(done)
+            progress(done)
+    reset_sequences(model)
+    return done
+
+
+def reset_sequences(model):
+    """
+    Сдвигает последовательности ключей после загрузки с явными id
+    (на SQLite не требуется).
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Progress:
+    """
+    Печатает число обработанных строк и скорость не чаще раза
+    в interval секунд.
+    """
+
+    def __init__(self, log, kind, interval=2.0):
+        self.log = log
+        self.kind = kind
+        self.interval = interval
+        self.started = self.reported = time.monotonic()
+
+    def __call__(self, count):
+        now = time.monotonic()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            self.report(count)
+
+    def report(self, count):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        self.log(f"{self.kind}: {count} строк, {count / elapsed:.0f} строк/с")
+
+
+def load_checkpoints(directory):
+    path = os.path.join(directory, PROGRESS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_checkpoints(directory, checkpoints):
+    path = os.path.join(directory, PROGRESS_FILE)
+    with open(path + ".tmp", "w") as file:
+        json.dump(checkpoints, file)
+    os.replace(path + ".tmp", path)
@@ -16,6 +16,9 @@ urlpatterns = [
     path("new/",
          views.new_post,
          name="new_post"),
+    path("search/",
+         views.search,
+         name="search"),
     path("new_group/",
          views.new_group,
          name="new_group"),
@@ -25,6 +28,9 @@ urlpatterns = [
     path("<str:username>/<int:post_id>/",
          views.post_view,
          name="post"),
+    path("<str:username>/<int:post_id>/comments/",
+         views.post_comments,
+         name="post_comments"),
     path("<str:username>/<int:post_id>/edit/",
          views.post_edit,
          name="post_edit"),
@@ -1,42 +1,75 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from yatube.loaders import get_loader
+
+from .cache import cache_feed_page
+from .conditional import conditional_page
 from .forms import CommentForm, GroupForm, PostForm
+from .loaders import following_flag
 from .models import Follow, Group, Post, User
-from .settings import CACHED_TIME_INDEX, POSTS_PER_PAGE
+from .paginator import CursorPaginator
+from .search import SearchResults
+from .settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+from .timeline import get_timeline_page
+
+
+def get_page(request, posts):
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE)
+    return paginator.get_page(request.GET.get("cursor"))
+
 
+def get_comments_paginator(post):
+    return CursorPaginator(
+        post.comments.select_related("author"),
+        COMMENTS_PER_PAGE,
+        ordering=("-created", "-id"),
+    )
 
-@cache_page(CACHED_TIME_INDEX)
+
+@conditional_page("index")
+@cache_feed_page("index")
 def index(request):
     posts_list = Post.objects.all()
     posts_list = posts_list.select_related("author", "group")
-    posts_list = posts_list.prefetch_related("comments")
-    paginator = Paginator(posts_list, POSTS_PER_PAGE)
-    page = paginator.get_page(request.GET.get("page"))
+    page = get_page(request, posts_list)
     context = {
         "page": page,
-        "paginator": paginator,
+        "paginator": page.paginator,
     }
     return render(request, "index.html", context)
 
 
+@conditional_page("group:{slug}")
+@cache_feed_page("group:{slug}")
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.all()
     posts = posts.select_related("author", "group")
-    posts = posts.prefetch_related("comments")
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page = paginator.get_page(request.GET.get("page"))
+    page = get_page(request, posts)
     context = {
         "group": group,
         "page": page,
-        "paginator": paginator,
+        "paginator": page.paginator,
     }
     return render(request, "group.html", context)
 
 
+def search(request):
+    query = request.GET.get("q", "").strip()
+    paginator = Paginator(SearchResults(query), POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get("page"))
+    context = {
+        "query": query,
+        "page": page,
+        "paginator": paginator,
+    }
+    return render(request, "search.html", context)
+
+
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None,
@@ -45,7 +78,10 @@ def new_post(request):
         return render(request, "new_post.html", {"form": form})
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    # Сигналы обновляют счетчики (AuthorStats, Post.comments_count)
+    # в одной транзакции с записью.
+    with transaction.atomic():
+        post.save()
     return redirect("index")
 
 
@@ -58,40 +94,69 @@ def new_group(request):
     return redirect("group_posts", slug=group.slug)
 
 
+@conditional_page("profile:{username}")
+@cache_feed_page("profile:{username}")
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    # Профиль, счетчики и признак подписки приходят одним запросом.
+    author = get_loader(request, "authors").get(username)
+    if author is None:
+        raise Http404
     author_posts = author.posts.all()
     author_posts = author_posts.select_related("author", "group")
-    author_posts = author_posts.prefetch_related("comments")
-    paginator = Paginator(author_posts, POSTS_PER_PAGE)
-    page = paginator.get_page(request.GET.get("page"))
-    following = (request.user.is_authenticated
-                 and request.user != author
-                 and request.user.follower.filter(author=author).exists())
+    page = get_page(request, author_posts)
     context = {
         "author": author,
         "page": page,
-        "paginator": paginator,
-        "following": following,
+        "paginator": page.paginator,
+        "following": author.is_following,
     }
     return render(request, "profile.html", context)
 
 
+@conditional_page("profile:{username}")
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    following = (request.user.is_authenticated
-                 and request.user != post.author
-                 and request.user.follower.filter(author=post.author).exists())
+    post = get_object_or_404(
+        Post.objects.select_related(
+            "author__profile", "author__stats", "group"
+        ).annotate(is_following=following_flag(request, "author")),
+        id=post_id,
+        author__username=username,
+    )
+    post.author.is_following = post.is_following
+    get_loader(request, "authors").prime(username, post.author)
+    # Первая страница комментариев остается QuerySet, а есть ли
+    # продолжение, видно по денормализованному comments_count.
+    paginator = get_comments_paginator(post)
+    comments = paginator.object_list.order_by(
+        *paginator.ordering
+    )[:COMMENTS_PER_PAGE]
+    comments_cursor = None
+    if post.comments_count > COMMENTS_PER_PAGE and comments:
+        comments_cursor = paginator.encode(paginator.NEXT,
+                                           comments[len(comments) - 1])
     context = {
         "author": post.author,
         "post": post,
-        "comments": post.comments.all(),
+        "comments": comments,
+        "comments_cursor": comments_cursor,
         "form": CommentForm(),
-        "following": following,
+        "following": post.is_following,
     }
     return render(request, "post.html", context)
 
 
+def post_comments(request, username, post_id):
+    post = get_object_or_404(Post.objects.select_related("author"),
+                             id=post_id, author__username=username)
+    page = get_comments_paginator(post).get_page(request.GET.get("cursor"))
+    context = {
+        "post": post,
+        "comments": page,
+        "comments_cursor": page.next_cursor,
+    }
+    return render(request, "comments_page.html", context)
+
+
 @login_required
 def post_edit(request, username, post_id):
     if username != request.user.username:
@@ -103,7 +168,8 @@ def post_edit(request, username, post_id):
     if not form.is_valid():
         context = {"form": form, "post": post}
         return render(request, "new_post.html", context)
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect("post", username=username, post_id=post_id)
 
 
@@ -115,20 +181,17 @@ def add_comment(request, username, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect("post", username=username, post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    posts = posts.select_related("author", "group")
-    posts = posts.prefetch_related("comments")
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page = paginator.get_page(request.GET.get("page"))
+    page = get_timeline_page(request.user, request.GET.get("cursor"))
     context = {
         "page": page,
-        "paginator": paginator,
+        "paginator": page.paginator,
     }
     return render(request, "follow.html", context)
 
@@ -137,21 +200,21 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        if not request.user.follower.filter(author=author).exists():
-            Follow.objects.create(
-                user=request.user,
-                author=author,
-            )
+        Follow.objects.get_or_create(
+            user=request.user,
+            author=author,
+        )
     return redirect("profile", username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    get_object_or_404(
-        Follow,
-        user=request.user,
-        author__username=username
-    ).delete()
+    with transaction.atomic():
+        get_object_or_404(
+            Follow,
+            user=request.user,
+            author__username=username
+        ).delete()
     return redirect("profile", username=username)
 
 
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "status", "attempts", "available_at",
+                    "created")
+    list_filter = ("status", "name")
+    readonly_fields = ("created",)
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,100 @@
+"""
+Отправка писем через очередь задач.
+
+QueuedEmailBackend ставит каждое письмо в очередь, а задача send_email
+отправляет его через TASKS_EMAIL_BACKEND, поэтому запрос (например,
+восстановление пароля) не ждет почтовый сервер. Письмо с вложением
+в виде готового MIME-объекта не сводится к JSON и отправляется сразу.
+"""
+import base64
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import task
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        direct = []
+        for message in email_messages:
+            data = serialize_message(message)
+            if data is None:
+                direct.append(message)
+            else:
+                send_email.delay(data)
+        if direct:
+            get_connection(settings.TASKS_EMAIL_BACKEND).send_messages(direct)
+        return len(email_messages)
+
+
+def serialize_message(message):
+    """
+    Данные письма для задачи или None, если письмо нельзя
+    сохранить в JSON.
+    """
+    if any(isinstance(item, MIMEBase) for item in message.attachments):
+        return None
+    return {
+        "subject": message.subject,
+        "body": message.body,
+        "from_email": message.from_email,
+        "to": message.to,
+        "cc": message.cc,
+        "bcc": message.bcc,
+        "reply_to": message.reply_to,
+        "headers": message.extra_headers,
+        "content_subtype": message.content_subtype,
+        "mixed_subtype": message.mixed_subtype,
+        "encoding": message.encoding,
+        "alternatives": [
+            [_dump_content(content), mimetype]
+            for content, mimetype in getattr(message, "alternatives", [])
+        ],
+        "attachments": [
+            [filename, _dump_content(content), mimetype]
+            for filename, content, mimetype in message.attachments
+        ],
+    }
+
+
+@task(max_attempts=5, retry_delay=60)
+def send_email(data):
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        headers=data["headers"],
+        alternatives=[
+            (_load_content(content), mimetype)
+            for content, mimetype in data["alternatives"]
+        ],
+        attachments=[
+            (filename, _load_content(content), mimetype)
+            for filename, content, mimetype in data.get("attachments", [])
+        ],
+        connection=get_connection(settings.TASKS_EMAIL_BACKEND),
+    )
+    message.content_subtype = data.get("content_subtype", "plain")
+    message.mixed_subtype = data.get("mixed_subtype", "mixed")
+    message.encoding = data.get("encoding")
+    message.send()
+
+
+def _dump_content(content):
+    # Двоичные вложения хранятся в JSON задачи в base64.
+    if isinstance(content, bytes):
+        return {"base64": base64.b64encode(content).decode("ascii")}
+    return content
+
+
+def _load_content(content):
+    if isinstance(content, dict):
+        return base64.b64decode(content["base64"])
+    return content
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import run_pending
+
+
+class Command(BaseCommand):
+    help = "Рабочий процесс очереди фоновых задач."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить доступные задачи и завершиться.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Пауза в секундах, когда очередь пуста.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            count = run_pending()
+            if count:
+                self.stdout.write(f"Выполнено задач: {count}")
+            if options["once"]:
+                return
+            if not count:
+                time.sleep(options["sleep"])
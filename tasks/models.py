@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+    Отложенный вызов функции, помеченной @task. Рабочий процесс
+    (manage.py run_tasks) забирает задачу, делая ее невидимой для других
+    на время TASKS_VISIBILITY_TIMEOUT, и удаляет после выполнения.
+    """
+    QUEUED = "queued"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField(
+        "Функция",
+        max_length=200,
+    )
+    arguments = models.TextField(
+        "Аргументы (JSON)",
+    )
+    status = models.CharField(
+        "Состояние",
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField(
+        "Попыток",
+        default=0,
+    )
+    max_attempts = models.PositiveIntegerField(
+        "Максимум попыток",
+    )
+    available_at = models.DateTimeField(
+        "Доступна с",
+        default=timezone.now,
+    )
+    created = models.DateTimeField(
+        "Дата создания",
+        auto_now_add=True,
+    )
+    last_error = models.TextField(
+        "Последняя ошибка",
+        blank=True,
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("status", "available_at"),
+                name="task_status_available_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,156 @@
+"""
+Очередь фоновых задач в БД.
+
+Функция, помеченная @task, ставится в очередь вызовом func.delay(...):
+в таблицу Task записывается ее имя и аргументы (JSON). Запись идет
+в текущей транзакции, поэтому рабочий процесс увидит задачу только после
+ее фиксации. Рабочий процесс (manage.py run_tasks) забирает задачу,
+сдвигая available_at на TASKS_VISIBILITY_TIMEOUT вперед: если процесс
+упадет, задача снова станет доступна. Успешно выполненная задача
+удаляется, после ошибки повторяется с растущей задержкой, а после
+max_attempts ошибок остается в таблице в состоянии failed.
+
+При TASKS_EAGER задачи выполняются сразу в текущем процессе.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+from functools import update_wrapper
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskFunction:
+    def __init__(self, func, max_attempts, retry_delay):
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        update_wrapper(self, func)
+        _registry[self.name] = self
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Ставит вызов в очередь (при TASKS_EAGER - выполняет сразу).
+        """
+        if settings.TASKS_EAGER:
+            try:
+                self.func(*args, **kwargs)
+            except Exception:
+                logger.exception("Задача %s%r завершилась ошибкой",
+                                 self.name, args)
+            return None
+        return Task.objects.create(
+            name=self.name,
+            arguments=json.dumps({"args": args, "kwargs": kwargs}),
+            max_attempts=self.max_attempts,
+        )
+
+
+def task(func=None, max_attempts=3, retry_delay=10):
+    """
+    Делает функцию фоновой задачей: @task или
+    @task(max_attempts=5, retry_delay=60). Аргументы должны
+    сериализоваться в JSON.
+    """
+    def decorator(func):
+        return TaskFunction(func, max_attempts, retry_delay)
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        # Функция регистрируется при импорте своего модуля.
+        import_module(name.rsplit(".", 1)[0])
+    return _registry[name]
+
+
+def claim(now=None):
+    """
+    Забирает первую доступную задачу или возвращает None.
+    """
+    now = now or timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED,
+        available_at__lte=now,
+    ).order_by("available_at", "pk").values_list("pk", "available_at")
+    for pk, available_at in candidates[:10]:
+        # Задачу мог забрать другой процесс: обновление пройдет,
+        # только если available_at еще не сдвинут.
+        claimed = Task.objects.filter(
+            pk=pk,
+            status=Task.QUEUED,
+            available_at=available_at,
+        ).update(
+            available_at=now + timedelta(
+                seconds=settings.TASKS_VISIBILITY_TIMEOUT
+            ),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(task_row):
+    """
+    Выполняет забранную задачу: удаляет ее после успеха,
+    откладывает или помечает failed после ошибки.
+    """
+    func = None
+    try:
+        func = get_task(task_row.name)
+        arguments = json.loads(task_row.arguments)
+        with transaction.atomic():
+            func(*arguments["args"], **arguments["kwargs"])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Задача %s завершилась ошибкой", task_row)
+        if task_row.attempts >= task_row.max_attempts:
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.FAILED,
+                last_error=error,
+            )
+            return False
+        retry_delay = func.retry_delay if func is not None else 0
+        Task.objects.filter(pk=task_row.pk).update(
+            available_at=timezone.now() + timedelta(
+                seconds=retry_delay * 2 ** (task_row.attempts - 1)
+            ),
+            last_error=error,
+        )
+        return False
+    Task.objects.filter(pk=task_row.pk).delete()
+    return True
+
+
+def run_pending(limit=None):
+    """
+    Выполняет доступные задачи, пока они есть (не больше limit).
+    Возвращает число выполненных задач.
+    """
+    count = 0
+    while limit is None or count < limit:
+        task_row = claim()
+        if task_row is None:
+            break
+        execute(task_row)
+        count += 1
+    return count
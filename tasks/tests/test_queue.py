@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+from email.mime.text import MIMEText
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Follow, Post, TimelineEntry, User
+from tasks.models import Task
+from tasks.queue import claim, execute, run_pending, task
+
+
+calls = []
+
+
+@task(max_attempts=2, retry_delay=60)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=60)
+def fail():
+    raise ValueError("ошибка задачи")
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_queues_and_worker_runs(self):
+        """delay() ставит задачу в очередь, рабочий процесс ее выполняет."""
+        record.delay("значение")
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ["значение"])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        """При TASKS_EAGER задача выполняется сразу."""
+        record.delay(1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claimed_task_is_hidden_until_visibility_timeout(self):
+        """Забранная задача невидима, пока не истечет таймаут."""
+        record.delay(1)
+        self.assertIsNotNone(claim())
+        self.assertIsNone(claim())
+        later = timezone.now() + timedelta(seconds=301)
+        task_row = claim(now=later)
+        self.assertIsNotNone(task_row)
+        self.assertEqual(task_row.attempts, 2)
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        """Ошибка откладывает задачу, после max_attempts она failed."""
+        fail.delay()
+        task_row = claim()
+        self.assertFalse(execute(task_row))
+        task_row.refresh_from_db()
+        self.assertEqual(task_row.status, Task.QUEUED)
+        self.assertGreater(task_row.available_at,
+                           timezone.now() + timedelta(seconds=50))
+        self.assertIn("ошибка задачи", task_row.last_error)
+        self.assertIsNone(claim())
+        task_row = claim(now=timezone.now() + timedelta(seconds=61))
+        self.assertFalse(execute(task_row))
+        task_row.refresh_from_db()
+        self.assertEqual(task_row.status, Task.FAILED)
+        self.assertIsNone(claim(now=timezone.now() + timedelta(days=1)))
+
+    @override_settings(
+        EMAIL_BACKEND="tasks.mail.QueuedEmailBackend",
+        TASKS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    )
+    def test_queued_email_is_sent_by_worker(self):
+        """Письмо отправляется рабочим процессом, а не запросом."""
+        mail.send_mail("Тема", "Текст", "from@example.com",
+                       ["to@example.com"], html_message="<p>Текст</p>")
+        self.assertEqual(mail.outbox, [])
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Тема")
+        self.assertEqual(mail.outbox[0].alternatives,
+                         [("<p>Текст</p>", "text/html")])
+
+    @override_settings(
+        EMAIL_BACKEND="tasks.mail.QueuedEmailBackend",
+        TASKS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    )
+    def test_queued_email_keeps_attachments(self):
+        """Вложения и тип тела письма переживают очередь."""
+        message = mail.EmailMessage("Тема", "<p>Текст</p>",
+                                    "from@example.com", ["to@example.com"])
+        message.content_subtype = "html"
+        message.attach("note.txt", "Заметка", "text/plain")
+        message.attach("data.bin", b"\x00\xff", "application/octet-stream")
+        message.send()
+        run_pending()
+        sent = mail.outbox[0]
+        self.assertEqual(sent.content_subtype, "html")
+        self.assertEqual(sent.attachments, [
+            ("note.txt", "Заметка", "text/plain"),
+            ("data.bin", b"\x00\xff", "application/octet-stream"),
+        ])
+
+    @override_settings(
+        EMAIL_BACKEND="tasks.mail.QueuedEmailBackend",
+        TASKS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    )
+    def test_email_with_mime_attachment_is_sent_at_once(self):
+        """Письмо с MIME-вложением отправляется без очереди."""
+        message = mail.EmailMessage("Тема", "Текст", "from@example.com",
+                                    ["to@example.com"])
+        message.attach(MIMEText("Вложение"))
+        message.send()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(Task.objects.exists())
+
+    def test_timeline_tasks_follow_current_state(self):
+        """Раскладка по лентам идет в фоне и учитывает отписку."""
+        reader = User.objects.create_user(username="reader")
+        author = User.objects.create_user(username="author")
+        Post.objects.create(author=author, text="Запись")
+        follow = Follow.objects.create(user=reader, author=author)
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+        follow.delete()
+        run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+        Follow.objects.create(user=reader, author=author)
+        Post.objects.create(author=author, text="Новая запись")
+        run_pending()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 2
+        )
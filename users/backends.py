@@ -0,0 +1,47 @@
+from django.contrib.auth import (BACKEND_SESSION_KEY, backends,
+                                 get_user_model, middleware)
+from django.utils.functional import SimpleLazyObject
+
+
+User = get_user_model()
+
+BACKEND_PATH = "users.backends.ModelBackend"
+# Сессии, созданные до появления ModelBackend.
+LEGACY_BACKEND_PATH = "django.contrib.auth.backends.ModelBackend"
+
+
+class ModelBackend(backends.ModelBackend):
+    """
+    Загружает пользователя сессии вместе с профилем: аватару в меню
+    не нужен отдельный запрос.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related("profile").get(
+                pk=user_id
+            )
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class AuthenticationMiddleware(middleware.AuthenticationMiddleware):
+    """
+    Переводит сессии стандартного бэкенда Django на ModelBackend при
+    первом обращении к request.user. Стандартный бэкенд в
+    AUTHENTICATION_BACKENDS не указан: иначе каждая неудачная попытка
+    входа проверяла бы пароль дважды.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+def get_user(request):
+    if not hasattr(request, "_cached_user"):
+        session = request.session
+        if session.get(BACKEND_SESSION_KEY) == LEGACY_BACKEND_PATH:
+            session[BACKEND_SESSION_KEY] = BACKEND_PATH
+    return middleware.get_user(request)
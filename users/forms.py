@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 from django.forms.models import ModelForm
 
+from yatube.images import clean_image_upload, limit_image_field
+
 from .models import Profile
 
 
@@ -36,3 +38,10 @@ class ProfileForm(ModelForm):
             'bio',
             'image',
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        limit_image_field(self.fields['image'])
+
+    def clean_image(self):
+        return clean_image_upload(self.cleaned_data['image'])
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail_small_url',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Маленькая миниатюра аватара'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Миниатюра аватара'),
+        ),
+    ]
@@ -18,6 +18,18 @@ class Profile(models.Model):
         null=True,
         help_text="Загрузите фотографию",
     )
+    thumbnail_url = models.CharField(
+        "Миниатюра аватара",
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    thumbnail_small_url = models.CharField(
+        "Маленькая миниатюра аватара",
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
     bio = models.TextField(
         "Об авторе",
         blank=True,
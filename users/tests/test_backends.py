@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.contrib.auth import BACKEND_SESSION_KEY, authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.backends import LEGACY_BACKEND_PATH
+from users.models import User
+
+
+class ModelBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader",
+                                            password="secret")
+
+    def test_failed_login_checks_password_once(self):
+        """Неудачный вход проверяет пароль один раз."""
+        encode = PBKDF2PasswordHasher.encode
+        for username in ("reader", "nobody"):
+            with self.subTest(username=username), mock.patch.object(
+                PBKDF2PasswordHasher, "encode", autospec=True,
+                side_effect=encode,
+            ) as hasher:
+                self.assertIsNone(authenticate(username=username,
+                                               password="wrong"))
+                self.assertEqual(hasher.call_count, 1)
+
+    def test_legacy_session_keeps_user_signed_in(self):
+        """Сессия стандартного бэкенда Django остается действующей."""
+        client = Client()
+        client.force_login(self.user, backend=LEGACY_BACKEND_PATH)
+        response = client.get(reverse("follow_index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], self.user)
+        self.assertEqual(client.session[BACKEND_SESSION_KEY],
+                         "users.backends.ModelBackend")
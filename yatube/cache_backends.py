@@ -0,0 +1,301 @@
+"""
+Кэш, общий для всех рабочих процессов.
+
+SQLiteCache хранит данные в отдельном файле SQLite (режим WAL),
+поэтому им могут пользоваться несколько процессов на одной машине.
+TieredCache ставит перед общим кэшем (SQLite, файловым или сетевым)
+небольшой LRU-кэш процесса с коротким временем жизни записей.
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+MISSING = object()
+MAX_QUERY_PARAMS = 999
+
+# Локальные уровни TieredCache общие для всех потоков процесса.
+_local_tiers = {}
+_local_locks = {}
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    # Вероятность проверки переполнения кэша при записи.
+    cull_probability = 0.01
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        # У каждого потока свое соединение: транзакции BEGIN IMMEDIATE
+        # разных потоков не должны смешиваться в одном соединении.
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)),
+                        exist_ok=True)
+            connection = sqlite3.connect(
+                self._path,
+                timeout=30,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                (key, time.time()),
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?, ?)",
+                (key, self._dumps(value), self.get_backend_timeout(timeout)),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._get_many_raw([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_key(key, version=version): key for key in keys}
+        for key in key_map:
+            self.validate_key(key)
+        return {
+            key_map[key]: value
+            for key, value in self._get_many_raw(list(key_map)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+            (key, self._dumps(value), self.get_backend_timeout(timeout)),
+        )
+        if random.random() < self.cull_probability:
+            self._cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self.connection.execute(
+            "UPDATE cache SET expires = ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self.connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache "
+                "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (self._dumps(value), key),
+            )
+            return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def clear(self):
+        self.connection.execute("DELETE FROM cache")
+
+    def _get_many_raw(self, keys):
+        rows = []
+        # Сборки SQLite до 3.32 принимают не больше 999 параметров.
+        for start in range(0, len(keys), MAX_QUERY_PARAMS):
+            chunk = keys[start:start + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows += self.connection.execute(
+                f"SELECT key, value, expires FROM cache "
+                f"WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchall()
+        now = time.time()
+        return {
+            key: pickle.loads(value)
+            for key, value, expires in rows
+            if expires is None or expires > now
+        }
+
+    def _cull(self):
+        connection = self.connection
+        connection.execute(
+            "DELETE FROM cache WHERE expires <= ?", (time.time(),)
+        )
+        count = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self._max_entries:
+            connection.execute(
+                "DELETE FROM cache WHERE rowid IN "
+                "(SELECT rowid FROM cache ORDER BY rowid LIMIT ?)",
+                (count // self._cull_frequency,),
+            )
+
+    def _dumps(self, value):
+        return sqlite3.Binary(pickle.dumps(value, self.pickle_protocol))
+
+    def _transaction(self):
+        return _ImmediateTransaction(self.connection)
+
+
+class _ImmediateTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кэш: LRU процесса перед общим кэшем.
+
+    Чтения сначала обращаются к локальному уровню, записи проходят
+    в общий кэш и сбрасывают локальную копию. Изменения, сделанные
+    другими процессами, видны не позднее чем через LOCAL_TIMEOUT секунд.
+    Параметры OPTIONS: SHARED_ALIAS - псевдоним общего кэша в CACHES,
+    LOCAL_TIMEOUT и LOCAL_MAX_ENTRIES - настройки локального уровня.
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get("OPTIONS", {}))
+        self._shared_alias = options.pop("SHARED_ALIAS", "shared")
+        self._local_timeout = options.pop("LOCAL_TIMEOUT", 5)
+        self._local_max_entries = options.pop("LOCAL_MAX_ENTRIES", 1000)
+        super().__init__(dict(params, OPTIONS=options))
+        name = location or self._shared_alias
+        self._local = _local_tiers.setdefault(name, OrderedDict())
+        self._lock = _local_locks.setdefault(name, threading.Lock())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, self._timeout(timeout),
+                                version=version)
+        self._forget(key, version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self._recall(key, version)
+        if value is not MISSING:
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        self._remember(key, version, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._recall(key, version)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._remember(key, version, value)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        self.shared.set(key, value, timeout, version=version)
+        if timeout is not None and timeout <= 0:
+            self._forget(key, version)
+        else:
+            self._remember(key, version, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, self._timeout(timeout),
+                                 version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self._forget(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.shared.clear()
+        with self._lock:
+            self._local.clear()
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _recall(self, key, version):
+        key = self.make_key(key, version=version)
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._local[key]
+                return MISSING
+            self._local.move_to_end(key)
+        return pickle.loads(value)
+
+    def _remember(self, key, version, value, timeout=None):
+        # Локальная копия не живет дольше значения в общем кэше.
+        if timeout is None or timeout > self._local_timeout:
+            timeout = self._local_timeout
+        key = self.make_key(key, version=version)
+        entry = (time.monotonic() + timeout, pickle.dumps(value))
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+
+    def _forget(self, key, version):
+        key = self.make_key(key, version=version)
+        with self._lock:
+            self._local.pop(key, None)
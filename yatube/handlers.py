@@ -0,0 +1,243 @@
+"""
+ASGI-приложение поверх WSGI-обработчика Django.
+
+Django 2.2 не умеет ASGI, поэтому ASGIHandler выполняет обычный
+WSGI-обработчик в пуле из ASGI_THREADS потоков, а обмен с клиентом
+ведет в цикле событий. Тело запроса читается целиком до вызова
+представления, а ответ отправляется после того, как поток уже
+освобожден, поэтому медленный клиент (загрузка картинки по плохой сети,
+медленное чтение страницы) не занимает поток: он занят только обработкой
+запроса. Потоковые ответы (StreamingHttpResponse, например события
+SSE) итерируются в отдельном пуле из ASGI_STREAM_THREADS потоков, чтобы
+долгие потоки не вытесняли обычные запросы; каждый фрагмент отправляется
+клиенту по мере готовности.
+"""
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.db import connections
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers or settings.ASGI_THREADS,
+            thread_name_prefix="wsgi",
+        )
+        self.stream_executor = ThreadPoolExecutor(
+            settings.ASGI_STREAM_THREADS,
+            thread_name_prefix="wsgi-stream",
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Тип соединения {scope['type']} "
+                             f"не поддерживается")
+        try:
+            body = await self.read_body(receive)
+        except RequestTooLarge:
+            await self.send_response(send, 413, [], b"")
+            return
+        except ClientDisconnected:
+            return
+        loop = asyncio.get_running_loop()
+        environ = get_environ(scope, body)
+        response = _Response(loop, send, head=scope["method"] == "HEAD")
+        watcher = asyncio.ensure_future(self.watch_disconnect(receive,
+                                                             response))
+        try:
+            content = await loop.run_in_executor(
+                self.executor, response.run, self.wsgi_application, environ
+            )
+            if isinstance(content, bytes):
+                await self.send_response(send, response.status,
+                                         response.headers, content)
+            else:
+                await loop.run_in_executor(self.stream_executor,
+                                           response.stream, content)
+        finally:
+            watcher.cancel()
+            body.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+        self.stream_executor.shutdown(wait=wait)
+
+    async def read_body(self, receive):
+        body = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                raise ClientDisconnected
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > settings.ASGI_MAX_BODY_SIZE:
+                body.close()
+                raise RequestTooLarge
+            body.write(chunk)
+            if not message.get("more_body", False):
+                body.seek(0)
+                return body
+
+    async def watch_disconnect(self, receive, response):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                response.disconnected.set()
+                return
+
+    async def send_response(self, send, status, headers, content):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers,
+        })
+        await send({"type": "http.response.body", "body": content})
+
+
+class _Response:
+    """
+    start_response для WSGI-приложения и отправка потокового ответа
+    из рабочего потока.
+    """
+
+    def __init__(self, loop, send, head):
+        self.loop = loop
+        self.send = send
+        self.head = head
+        self.status = None
+        self.headers = None
+        self.disconnected = threading.Event()
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = int(status.split(" ", 1)[0])
+        self.headers = [
+            (name.lower().encode("latin1"), value.encode("latin1"))
+            for name, value in headers
+        ]
+
+    def run(self, application, environ):
+        """
+        Выполняется в потоке пула. Обычный ответ возвращает телом
+        (bytes), закрыв его в этом же потоке: сигнал request_finished
+        закрывает соединения с БД потока, обработавшего запрос.
+        Потоковый ответ возвращает для self.stream().
+        """
+        iterable = application(environ, self.start_response)
+        if getattr(iterable, "streaming", False):
+            return iterable
+        try:
+            return b"" if self.head else b"".join(iterable)
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+    def stream(self, iterable):
+        """
+        Выполняется в потоке пула потоковых ответов.
+        """
+        try:
+            self._send({"type": "http.response.start",
+                        "status": self.status,
+                        "headers": self.headers})
+            if not self.head:
+                for chunk in iterable:
+                    if self.disconnected.is_set():
+                        return
+                    if chunk:
+                        self._send({"type": "http.response.body",
+                                    "body": chunk, "more_body": True})
+            self._send({"type": "http.response.body", "body": b""})
+        except ClientDisconnected:
+            pass
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+            connections.close_all()
+
+    def _send(self, message):
+        # Поток ждет отправки фрагмента: медленный клиент
+        # не накапливает поток в памяти.
+        try:
+            asyncio.run_coroutine_threadsafe(self.send(message),
+                                             self.loop).result()
+        except OSError:
+            self.disconnected.set()
+            raise ClientDisconnected
+
+
+def get_environ(scope, body):
+    """
+    WSGI-окружение для HTTP-запроса ASGI с телом body (файл).
+    """
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": _latin1(root_path),
+        "PATH_INFO": _latin1(path),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        # Признак для представлений: долгие ответы не занимают поток
+        # сервера (см. events.views).
+        "yatube.asgi": True,
+    }
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    return environ
+
+
+def _latin1(value):
+    # WSGI передает пути байтами, декодированными как latin-1.
+    return value.encode("utf-8").decode("latin1")
@@ -0,0 +1,114 @@
+"""
+Прием загружаемых изображений с ограниченным расходом памяти.
+
+limit_image_field подключает к полю ImageField формы проверку размера
+файла и числа пикселей по заголовку, которая выполняется до того, как
+поле прочитает файл в память и проверит (verify) изображение целиком.
+clean_image_upload повторяет эти проверки и уменьшает крупные
+фотографии при приеме: JPEG декодируется сразу в уменьшенном масштабе
+(режим draft), поэтому в памяти не оказывается полный кадр.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+
+# Pillow отказывается открывать изображения больше 2 * MAX_IMAGE_PIXELS,
+# это защищает и от "бомб" среди уже сохраненных файлов.
+Image.MAX_IMAGE_PIXELS = settings.IMAGE_UPLOAD_MAX_PIXELS
+
+
+ERROR_MESSAGES = {
+    "file_too_large": "Размер файла не должен превышать %(limit)s.",
+    "too_many_pixels": (
+        "Изображение слишком большое: %(width)s x %(height)s пикселей."
+    ),
+    "decompression_bomb": "Изображение слишком большое.",
+}
+
+
+def limit_image_field(field):
+    """
+    Проверяет загрузку до ImageField.to_python. Тип поля не меняется,
+    а поля формы копируются для каждого ее экземпляра.
+    """
+    to_python = field.to_python
+
+    def checked_to_python(data):
+        if isinstance(data, UploadedFile):
+            check_image_upload(data)
+        return to_python(data)
+
+    field.to_python = checked_to_python
+
+
+def check_image_upload(upload):
+    """
+    Отклоняет слишком большой файл и изображение с избытком пикселей.
+    Читается только заголовок изображения.
+    """
+    if upload.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            ERROR_MESSAGES["file_too_large"],
+            code="file_too_large",
+            params={
+                "limit": filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)
+            },
+        )
+    try:
+        with Image.open(upload) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise ValidationError(ERROR_MESSAGES["decompression_bomb"],
+                              code="too_many_pixels")
+    except Exception:
+        # Не изображение: ошибку сообщит ImageField.
+        return
+    finally:
+        upload.seek(0)
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            ERROR_MESSAGES["too_many_pixels"],
+            code="too_many_pixels",
+            params={"width": width, "height": height},
+        )
+
+
+def clean_image_upload(upload):
+    """
+    Проверяет загруженное изображение и уменьшает его при необходимости.
+    Вызывается из clean_<поле>() форм после проверки ImageField.
+    Уже сохраненные файлы не меняются.
+    """
+    if not isinstance(upload, UploadedFile):
+        return upload
+    check_image_upload(upload)
+    return downscale(upload)
+
+
+def downscale(upload):
+    """
+    Уменьшает изображение до IMAGE_UPLOAD_MAX_SIDE по большей стороне.
+    Подходящие по размеру и анимированные изображения не меняются.
+    """
+    max_side = settings.IMAGE_UPLOAD_MAX_SIDE
+    image = Image.open(upload)
+    image_format = image.format
+    if (max(image.size) <= max_side
+            or getattr(image, "is_animated", False)):
+        upload.seek(0)
+        return upload
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format=image_format,
+               quality=settings.IMAGE_UPLOAD_QUALITY)
+    return SimpleUploadedFile(upload.name, buffer.getvalue(),
+                              upload.content_type)
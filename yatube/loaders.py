@@ -0,0 +1,94 @@
+"""
+Пакетная загрузка данных в пределах запроса (в духе DataLoader).
+
+Загрузчик собирает ключи, запрошенные разными частями обработки
+запроса (представлением, контекстными процессорами), и выбирает их
+одним запросом при первом обращении к любому из значений. Результаты
+запоминаются до конца запроса. Один запрос получается, только если все
+ключи поставлены в очередь (load, load_many) до первого обращения:
+значение, запрошенное уже после него, выбирается отдельно. Поэтому
+ключи ставятся в очередь в коде до отрисовки шаблона, а не из
+шаблона по ходу цикла.
+
+Функция пакетной загрузки регистрируется под именем:
+
+    @register("authors")
+    def load_authors(request, usernames):
+        return {user.username: user for user in ...}
+
+и получается в запросе через get_loader(request, "authors").
+"""
+from django.utils.functional import SimpleLazyObject
+
+
+_batch_functions = {}
+
+
+def register(name):
+    """
+    Регистрирует функцию batch(request, keys) -> {ключ: значение}.
+    """
+    def decorator(batch):
+        _batch_functions[name] = batch
+        return batch
+    return decorator
+
+
+class DataLoader:
+    def __init__(self, batch):
+        self.batch = batch
+        self._values = {}
+        self._queue = []
+
+    def load(self, key):
+        """
+        Ставит ключ в очередь и возвращает ленивое значение: запрос
+        к БД выполняется при первом обращении к нему.
+        """
+        if key not in self._values and key not in self._queue:
+            self._queue.append(key)
+        return SimpleLazyObject(lambda: self.get(key))
+
+    def load_many(self, keys):
+        return [self.load(key) for key in keys]
+
+    def get(self, key):
+        """
+        Возвращает значение сразу (None, если его нет), выбрав заодно
+        все ключи из очереди.
+        """
+        if key not in self._values:
+            if key not in self._queue:
+                self._queue.append(key)
+            self.dispatch()
+        return self._values[key]
+
+    def prime(self, key, value):
+        """
+        Запоминает значение, уже полученное другим запросом.
+        """
+        self._values[key] = value
+        if key in self._queue:
+            self._queue.remove(key)
+
+    def dispatch(self):
+        keys, self._queue = self._queue, []
+        if not keys:
+            return
+        found = self.batch(keys)
+        for key in keys:
+            self._values[key] = found.get(key)
+
+
+def get_loader(request, name):
+    """
+    Загрузчик name, общий для всего запроса.
+    """
+    if not hasattr(request, "_loaders"):
+        request._loaders = {}
+    if name not in request._loaders:
+        batch = _batch_functions[name]
+        request._loaders[name] = DataLoader(
+            lambda keys: batch(request, keys)
+        )
+    return request._loaders[name]
@@ -0,0 +1,93 @@
+"""
+Учет запросов к БД во время обработки HTTP-запроса.
+
+QueryCountMiddleware считает запросы, их суммарное время и повторы
+одного и того же SELECT (признак N+1), пишет строку в журнал
+"yatube.queries" и, если включено QUERY_COUNT_HEADERS, добавляет
+заголовки X-DB-Queries и Server-Timing к ответу.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger("yatube.queries")
+
+
+class QueryRecorder:
+    """
+    Контекстный менеджер, записывающий SQL всех подключений к БД.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.duration = 0.0
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries.append(sql)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated_selects(self):
+        """
+        SELECT, выполненные больше одного раза (с любыми параметрами),
+        и число их выполнений.
+        """
+        counts = Counter(
+            sql for sql in self.queries
+            if sql.lstrip().upper().startswith("SELECT")
+        )
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.repeated_selects().values())
+
+
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        duration = recorder.duration * 1000
+        level = (
+            logging.WARNING
+            if recorder.duplicates >= settings.QUERY_DUPLICATES_WARNING
+            else logging.DEBUG
+        )
+        logger.log(
+            level,
+            "%s %s: %d queries, %.1f ms, %d duplicated",
+            request.method, request.path, len(recorder), duration,
+            recorder.duplicates,
+        )
+        if settings.QUERY_COUNT_HEADERS:
+            response["X-DB-Queries"] = (
+                f"count={len(recorder)}; duplicates={recorder.duplicates}"
+            )
+            response["Server-Timing"] = (
+                f'db;dur={duration:.1f};desc="{len(recorder)} queries"'
+            )
+        return response
@@ -0,0 +1,86 @@
+"""
+Чтение из реплик БД.
+
+ReplicaRoutingMiddleware разрешает чтение из реплики только для
+GET-запросов к представлениям из DATABASE_REPLICA_VIEWS, ReplicaRouter
+в этом случае отправляет SELECT в случайную реплику из DATABASE_REPLICAS.
+Все записи, чтения внутри транзакций и остальные запросы идут в основную
+БД. После изменяющего запроса браузер получает cookie, и в течение
+DATABASE_REPLICA_PIN_SECONDS его запросы читают из основной БД: автор
+сразу видит свой пост, комментарий или подписку, даже если реплика
+отстает.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = threading.local()
+
+
+def replica_reads_allowed():
+    return getattr(_state, "use_replica", False)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """
+    Разрешает (или запрещает) чтение из реплик в текущем потоке.
+    """
+    previous = replica_reads_allowed()
+    _state.use_replica = enabled
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (settings.DATABASE_REPLICAS and replica_reads_allowed()
+                and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.use_replica = False
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.DATABASE_REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.use_replica = (
+            request.method in SAFE_METHODS
+            and request.resolver_match.view_name
+            in settings.DATABASE_REPLICA_VIEWS
+            and settings.DATABASE_REPLICA_PIN_COOKIE not in request.COOKIES
+        )
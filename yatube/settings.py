@@ -29,9 +29,12 @@ INTERNAL_IPS = [
 # Application definition
 
 INSTALLED_APPS = [
-    'posts',
+    'posts.apps.PostsConfig',
     'users',
     'about',
+    'tasks',
+    'api',
+    'events.apps.EventsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -44,11 +47,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.queries.QueryCountMiddleware',
+    'yatube.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.backends.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -71,6 +76,8 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'yatube.context_processors.year',
                 'yatube.context_processors.logo_text',
+                'posts.context_processors.cache_times',
+                'events.context_processors.live_updates',
             ],
         },
     },
@@ -82,12 +89,83 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# YATUBE_DB_ENGINE, YATUBE_DB_NAME, YATUBE_DB_USER, YATUBE_DB_PASSWORD,
+# YATUBE_DB_HOST and YATUBE_DB_PORT select another database (e.g. engine
+# django.db.backends.postgresql). Connections are reused for
+# YATUBE_DB_CONN_MAX_AGE seconds (per request when DEBUG).
+
 DATABASES = {
     'default': {
+        'ENGINE': os.environ.get(
+            "YATUBE_DB_ENGINE", 'django.db.backends.sqlite3'
+        ),
+        'NAME': os.environ.get(
+            "YATUBE_DB_NAME", os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'USER': os.environ.get("YATUBE_DB_USER", ""),
+        'PASSWORD': os.environ.get("YATUBE_DB_PASSWORD", ""),
+        'HOST': os.environ.get("YATUBE_DB_HOST", ""),
+        'PORT': os.environ.get("YATUBE_DB_PORT", ""),
+        'CONN_MAX_AGE': int(
+            os.environ.get("YATUBE_DB_CONN_MAX_AGE", 0 if DEBUG else 600)
+        ),
+    }
+}
+
+# SQLite connections run these PRAGMAs when opened (yatube.sqlite): WAL lets
+# readers work alongside a writer, busy_timeout makes concurrent writers wait
+# for the lock instead of failing, cache_size (negative = KiB) and mmap_size
+# (bytes) keep hot pages in memory.
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": int(os.environ.get("YATUBE_SQLITE_BUSY_TIMEOUT", 10000)),
+    "cache_size": -int(os.environ.get("YATUBE_SQLITE_CACHE_KB", 64000)),
+    "mmap_size": int(os.environ.get("YATUBE_SQLITE_MMAP_SIZE", 256 * 2 ** 20)),
+    "temp_store": "memory",
+}
+
+# Read replicas
+# YATUBE_REPLICA_DB lists comma-separated SQLite files (copies of the primary
+# kept up to date by replication, or by "manage.py sync_replica" locally).
+# GET requests to DATABASE_REPLICA_VIEWS read from a random replica; any other
+# request and everything inside a transaction uses the primary. After a write
+# the browser is pinned to the primary for DATABASE_REPLICA_PIN_SECONDS so the
+# author sees their own changes despite replication lag.
+
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get("YATUBE_REPLICA_DB", "").split(","))
+):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': name,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+DATABASE_REPLICA_VIEWS = {
+    "index",
+    "group_posts",
+    "profile",
+    "post",
+    "post_comments",
+    "follow_index",
+    "search",
+    "about:author",
+    "about:tech",
+    "api:posts",
+    "api:post",
+    "api:comments",
+    "api:feed",
 }
+DATABASE_REPLICA_PIN_SECONDS = 10
+DATABASE_REPLICA_PIN_COOKIE = "db_primary"
 
 
 # Password validation
@@ -133,7 +211,48 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 
+# Query instrumentation
+# Every request logs its query count, DB time and repeated SELECTs to the
+# "yatube.queries" logger (WARNING from QUERY_DUPLICATES_WARNING repeats).
+# QUERY_COUNT_HEADERS adds them to X-DB-Queries and Server-Timing headers.
+
+QUERY_COUNT_HEADERS = DEBUG
+QUERY_DUPLICATES_WARNING = 5
+
+
+# Image uploads
+# Uploads larger than IMAGE_UPLOAD_MAX_SIZE bytes or IMAGE_UPLOAD_MAX_PIXELS
+# pixels are rejected before decoding; bigger sides are downscaled to
+# IMAGE_UPLOAD_MAX_SIDE on ingest and re-encoded with IMAGE_UPLOAD_QUALITY.
+
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+IMAGE_UPLOAD_MAX_SIDE = 2048
+IMAGE_UPLOAD_QUALITY = 90
+
+
+# Background tasks
+# Thumbnails, timeline fan-out and emails run as tasks (tasks.queue) queued
+# in the database and executed by "manage.py run_tasks". With TASKS_EAGER
+# they run inline instead, so no worker is needed during development.
+# A claimed task is hidden from other workers for TASKS_VISIBILITY_TIMEOUT
+# seconds and becomes available again if its worker dies.
+
+TASKS_EAGER = os.environ.get(
+    "YATUBE_TASKS_EAGER", "1" if DEBUG else ""
+) == "1"
+TASKS_VISIBILITY_TIMEOUT = 300
+
+
 # Login
+# Sessions load the user together with the profile (navbar avatar). Only one
+# backend is listed: every listed backend checks the password of a failed
+# login. Sessions created with Django's backend are moved over by
+# users.backends.AuthenticationMiddleware.
+
+AUTHENTICATION_BACKENDS = [
+    "users.backends.ModelBackend",
+]
 
 LOGIN_URL = "/auth/login/"
 
@@ -143,16 +262,106 @@ LOGOUT_REDIRECT_URL = "index"
 
 
 # Email
+# Emails are queued as tasks and sent by TASKS_EMAIL_BACKEND.
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+EMAIL_BACKEND = "tasks.mail.QueuedEmailBackend"
+
+TASKS_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 
 # Cache
+# YATUBE_CACHE selects a cache shared by all worker processes: "file",
+# "sqlite" or a dotted path of any cache backend (e.g. memcached) with
+# YATUBE_CACHE_LOCATION. Reads of a shared cache go through a small
+# in-process LRU tier whose entries live YATUBE_CACHE_LOCAL_TIMEOUT seconds.
+# The default "locmem" keeps a separate cache per process.
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "sqlite": "yatube.cache_backends.SQLiteCache",
+}
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+CACHE_DEFAULT_LOCATIONS = {
+    "file": os.path.join(BASE_DIR, "cache"),
+    "sqlite": os.path.join(BASE_DIR, "cache.sqlite3"),
 }
+
+CACHE_BACKEND = os.environ.get("YATUBE_CACHE", "locmem")
+
+if CACHE_BACKEND == "locmem":
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKENDS["locmem"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'yatube.cache_backends.TieredCache',
+            'OPTIONS': {
+                'SHARED_ALIAS': 'shared',
+                'LOCAL_TIMEOUT': int(
+                    os.environ.get("YATUBE_CACHE_LOCAL_TIMEOUT", 5)
+                ),
+            },
+        },
+        'shared': {
+            'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+            'LOCATION': os.environ.get(
+                "YATUBE_CACHE_LOCATION",
+                CACHE_DEFAULT_LOCATIONS.get(CACHE_BACKEND, ""),
+            ),
+        },
+    }
+
+
+# Live updates
+# Feed and post pages learn about new posts and comments over Server-Sent
+# Events (events.views) and fall back to long polling when a stream cannot be
+# kept open. Both hold the connection open, so they are only used under
+# yatube.asgi (where waiting does not hold a worker thread, see ASGI below);
+# under a WSGI server pages poll every EVENTS_SHORT_POLL_INTERVAL seconds
+# instead. The broker keeps the last EVENTS_BUFFER_SIZE events in memory;
+# LocalBroker reaches subscribers of its own process only, CacheBroker passes
+# events between processes through the EVENTS_CACHE alias, polled every
+# EVENTS_POLL_INTERVAL seconds; an event whose id is taken but which is not
+# written yet is waited for up to EVENTS_PUBLISH_GRACE seconds. Each open
+# stream holds a thread of the ASGI_STREAM_THREADS pool, hence the connection
+# limits (per signed-in user or per session); streams are closed after
+# EVENTS_STREAM_TIMEOUT seconds and browsers reconnect from the last event
+# they saw.
+
+EVENTS_BROKER = os.environ.get(
+    "YATUBE_EVENTS_BROKER",
+    "events.broker.LocalBroker" if CACHE_BACKEND == "locmem"
+    else "events.broker.CacheBroker",
+)
+EVENTS_CACHE = "shared"
+EVENTS_CACHE_TIME = 60 * 10
+EVENTS_POLL_INTERVAL = 1
+EVENTS_PUBLISH_GRACE = 5
+EVENTS_BUFFER_SIZE = 1000
+EVENTS_MAX_CONNECTIONS = int(
+    os.environ.get("YATUBE_EVENTS_MAX_CONNECTIONS", 100)
+)
+EVENTS_MAX_CLIENT_CONNECTIONS = 4
+EVENTS_STREAM_TIMEOUT = 60 * 5
+EVENTS_HEARTBEAT = 15
+EVENTS_LONG_POLL_TIMEOUT = 25
+EVENTS_SHORT_POLL_INTERVAL = 30
+EVENTS_RETRY = 5
+
+
+# ASGI
+# yatube.asgi runs the Django request handler in a pool of ASGI_THREADS
+# threads and talks to clients in the event loop, so slow uploads and slow
+# readers do not hold a thread. Streaming responses (live updates) run in a
+# separate pool of ASGI_STREAM_THREADS threads; request bodies larger than
+# ASGI_MAX_BODY_SIZE bytes are refused with 413.
+
+ASGI_THREADS = int(os.environ.get("YATUBE_ASGI_THREADS", 8))
+ASGI_STREAM_THREADS = EVENTS_MAX_CONNECTIONS
+ASGI_MAX_BODY_SIZE = IMAGE_UPLOAD_MAX_SIZE + 2 * 1024 * 1024
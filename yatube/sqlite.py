@@ -0,0 +1,23 @@
+"""
+Настройка подключений к SQLite.
+
+При каждом новом подключении tune_connection выполняет PRAGMA из
+SQLITE_PRAGMAS: журнал WAL (читатели не блокируют писателя),
+ожидание освобождения блокировки вместо немедленной ошибки
+"database is locked", размер кэша страниц и отображение файла в память.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def tune_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def connect():
+    connection_created.connect(tune_connection,
+                               dispatch_uid="yatube.sqlite.tune_connection")
@@ -0,0 +1,32 @@
+"""
+Помощники для тестов: бюджет запросов к БД на представление.
+"""
+from yatube.queries import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """
+    Примесь к TestCase. query_budgets задает для имени URL наибольшее
+    допустимое число запросов; повтор одного SELECT считается N+1.
+    """
+
+    query_budgets = {}
+
+    def assertQueryBudget(self, url_name, make_request):
+        with QueryRecorder() as recorder:
+            response = make_request()
+        queries = "\n".join(
+            f"{number}. {sql}"
+            for number, sql in enumerate(recorder.queries, start=1)
+        )
+        self.assertLessEqual(
+            len(recorder),
+            self.query_budgets[url_name],
+            f"{url_name}: превышен бюджет запросов\n{queries}",
+        )
+        self.assertEqual(
+            recorder.repeated_selects(),
+            {},
+            f"{url_name}: повторяющиеся запросы (N+1)\n{queries}",
+        )
+        return response
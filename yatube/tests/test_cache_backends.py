@@ -0,0 +1,127 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from yatube.cache_backends import SQLiteCache
+
+
+CACHE_DIR = tempfile.mkdtemp()
+CACHE_PATH = os.path.join(CACHE_DIR, "cache.sqlite3")
+TIERED_CACHES = {
+    "default": {
+        "BACKEND": "yatube.cache_backends.TieredCache",
+        "LOCATION": "tiered-tests",
+        "OPTIONS": {"SHARED_ALIAS": "shared", "LOCAL_TIMEOUT": 60},
+    },
+    "shared": {
+        "BACKEND": "yatube.cache_backends.SQLiteCache",
+        "LOCATION": CACHE_PATH,
+    },
+}
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = SQLiteCache(CACHE_PATH, {})
+        self.cache.clear()
+
+    def test_values_are_shared_between_instances(self):
+        """Значение, записанное одним экземпляром, видно другому."""
+        self.cache.set("key", {"value": 1})
+        other = SQLiteCache(CACHE_PATH, {})
+        self.assertEqual(other.get("key"), {"value": 1})
+        self.assertEqual(other.get_many(["key", "missing"]),
+                         {"key": {"value": 1}})
+
+    def test_get_many_splits_keys(self):
+        """get_many не упирается в лимит параметров запроса SQLite."""
+        # Лимит старых сборок SQLite.
+        self.cache.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER,
+                                       999)
+        keys = [f"key{number}" for number in range(2500)]
+        self.cache.set("key2499", "last")
+        self.cache.set("key0", "first")
+        self.assertEqual(self.cache.get_many(keys),
+                         {"key0": "first", "key2499": "last"})
+
+    def test_add_incr_delete(self):
+        """add не перезаписывает значение, incr и delete работают."""
+        self.assertTrue(self.cache.add("counter", 1))
+        self.assertFalse(self.cache.add("counter", 10))
+        self.assertEqual(self.cache.incr("counter"), 2)
+        self.cache.delete("counter")
+        self.assertIsNone(self.cache.get("counter"))
+        with self.assertRaises(ValueError):
+            self.cache.incr("counter")
+
+    def test_incr_from_many_threads(self):
+        """Потоки с общим экземпляром не теряют увеличений счетчика."""
+        self.cache.add("counter", 0)
+        errors = []
+
+        def increment():
+            try:
+                for _ in range(50):
+                    self.cache.add("counter", 0)
+                    self.cache.incr("counter")
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.get("counter"), 400)
+
+    def test_expired_value_is_missing(self):
+        """Просроченное значение не возвращается и не мешает add."""
+        self.cache.set("key", "value", 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "new"))
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Повторное чтение обслуживает локальный уровень."""
+        caches["default"].set("key", "value")
+        caches["shared"].set("key", "changed elsewhere")
+        self.assertEqual(caches["default"].get("key"), "value")
+
+    def test_local_copy_expires_with_shared_value(self):
+        """Локальная копия не переживает короткий таймаут записи."""
+        tiered = caches["default"]
+        tiered.set("key", "value", 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(tiered.get("key"))
+        tiered.set("key", "value", 0)
+        self.assertIsNone(tiered.get("key"))
+
+    def test_writes_go_through_to_shared_tier(self):
+        """Записи сразу попадают в общий уровень и сбрасывают локальный."""
+        tiered = caches["default"]
+        tiered.set("counter", 1)
+        self.assertEqual(tiered.incr("counter"), 2)
+        self.assertEqual(tiered.get("counter"), 2)
+        self.assertEqual(caches["shared"].get("counter"), 2)
+        self.assertFalse(tiered.add("counter", 10))
+        tiered.delete("counter")
+        self.assertIsNone(caches["shared"].get("counter"))
+        self.assertIsNone(tiered.get("counter"))
@@ -0,0 +1,94 @@
+import asyncio
+
+from django.test import SimpleTestCase, override_settings
+
+from yatube.handlers import ASGIHandler
+
+
+def echo(environ, start_response):
+    start_response("201 Created", [("Content-Type", "text/plain"),
+                                   ("X-Path", environ["PATH_INFO"])])
+    body = environ["wsgi.input"].read()
+    return [
+        f"{environ['REQUEST_METHOD']} {environ['QUERY_STRING']} "
+        f"{environ['HTTP_X_TOKEN']} {environ['REMOTE_ADDR']} ".encode(),
+        body,
+    ]
+
+
+class Stream:
+    streaming = True
+    closed = False
+
+    def __iter__(self):
+        yield b"first"
+        yield b"second"
+
+    def close(self):
+        self.closed = True
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    def call(self, application, method="GET", body=b"", chunk_size=None):
+        handler = ASGIHandler(application, max_workers=1)
+        chunk_size = chunk_size or len(body) or 1
+        messages = [
+            {"type": "http.request", "body": body[start:start + chunk_size],
+             "more_body": start + chunk_size < len(body)}
+            for start in range(0, len(body), chunk_size)
+        ] or [{"type": "http.request"}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(60)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": method,
+            "path": "/путь/",
+            "query_string": b"page=2",
+            "headers": [(b"x-token", b"secret")],
+            "client": ("192.0.2.1", 1234),
+        }
+        try:
+            asyncio.run(handler(scope, receive, send))
+        finally:
+            handler.shutdown()
+        return sent
+
+    def test_request_is_passed_to_wsgi_application(self):
+        """Запрос ASGI превращается в окружение WSGI, тело собирается."""
+        start, body = self.call(echo, "POST", b"abcdef", chunk_size=2)
+        self.assertEqual(start["status"], 201)
+        self.assertIn((b"x-path", "/путь/".encode()), start["headers"])
+        self.assertEqual(body["body"],
+                         b"POST page=2 secret 192.0.2.1 abcdef")
+
+    def test_head_response_has_no_body(self):
+        """На HEAD отправляются только заголовки."""
+        start, body = self.call(echo, "HEAD")
+        self.assertEqual(body["body"], b"")
+
+    @override_settings(ASGI_MAX_BODY_SIZE=4)
+    def test_large_body_is_refused(self):
+        """Слишком большое тело отклоняется до вызова приложения."""
+        start, _ = self.call(echo, "POST", b"abcdef", chunk_size=2)
+        self.assertEqual(start["status"], 413)
+
+    def test_streaming_response_is_sent_by_chunks(self):
+        """Потоковый ответ отправляется по фрагментам и закрывается."""
+        stream = Stream()
+
+        def application(environ, start_response):
+            start_response("200 OK", [])
+            return stream
+
+        messages = self.call(application)
+        self.assertEqual([message.get("body") for message in messages],
+                         [None, b"first", b"second", b""])
+        self.assertTrue(stream.closed)
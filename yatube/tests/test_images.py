@@ -0,0 +1,70 @@
+from io import BytesIO
+from unittest import mock
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from posts.forms import PostForm
+from yatube.images import clean_image_upload
+
+
+def make_upload(size, image_format="JPEG", name="photo.jpg"):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@override_settings(IMAGE_UPLOAD_MAX_SIZE=50 * 1024,
+                   IMAGE_UPLOAD_MAX_PIXELS=1000 * 1000,
+                   IMAGE_UPLOAD_MAX_SIDE=200)
+class CleanImageUploadTests(SimpleTestCase):
+    def clean(self, upload):
+        return clean_image_upload(forms.ImageField().clean(upload))
+
+    def test_small_image_is_kept(self):
+        """Небольшое изображение сохраняется без изменений."""
+        upload = make_upload((100, 50))
+        content = upload.read()
+        upload.seek(0)
+        self.assertEqual(self.clean(upload).read(), content)
+
+    def test_large_image_is_downscaled(self):
+        """Большая сторона уменьшается до IMAGE_UPLOAD_MAX_SIDE."""
+        cleaned = self.clean(make_upload((800, 400)))
+        image = Image.open(cleaned)
+        self.assertEqual(image.size, (200, 100))
+        self.assertEqual(image.format, "JPEG")
+
+    def test_too_many_pixels_are_rejected(self):
+        """Изображение с избытком пикселей отклоняется по заголовку."""
+        with self.assertRaises(ValidationError) as context:
+            self.clean(make_upload((2000, 1000), "PNG", "big.png"))
+        self.assertEqual(context.exception.code, "too_many_pixels")
+
+    def test_large_file_is_rejected(self):
+        """Файл больше IMAGE_UPLOAD_MAX_SIZE отклоняется до декодирования."""
+        upload = make_upload((100, 50))
+        with override_settings(IMAGE_UPLOAD_MAX_SIZE=100):
+            with self.assertRaises(ValidationError) as context:
+                self.clean(upload)
+        self.assertEqual(context.exception.code, "file_too_large")
+
+    def test_form_checks_upload_before_verifying_image(self):
+        """Форма отклоняет файл до полной проверки изображения."""
+        uploads = {
+            "too_many_pixels": (make_upload((2000, 1000), "PNG", "big.png"),
+                                50 * 1024),
+            "file_too_large": (make_upload((100, 50)), 100),
+        }
+        for code, (upload, max_size) in uploads.items():
+            with self.subTest(code=code), \
+                    override_settings(IMAGE_UPLOAD_MAX_SIZE=max_size), \
+                    mock.patch.object(Image.Image, "verify") as verify:
+                form = PostForm({"text": "Текст"}, {"image": upload})
+                self.assertFalse(form.is_valid())
+                self.assertTrue(form.has_error("image", code))
+                verify.assert_not_called()
+                self.assertIs(type(form.fields["image"]), forms.ImageField)
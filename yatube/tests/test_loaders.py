@@ -0,0 +1,68 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from posts.models import Follow, User
+from yatube.loaders import DataLoader, get_loader
+
+
+class DataLoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+
+        def batch(keys):
+            self.batches.append(keys)
+            return {key: key.upper() for key in keys if key != "missing"}
+
+        self.loader = DataLoader(batch)
+
+    def test_queued_keys_are_loaded_in_one_batch(self):
+        """Ключи из очереди выбираются одним вызовом при первом обращении."""
+        first, second = self.loader.load_many(["a", "b"])
+        missing = self.loader.load("missing")
+        self.assertEqual(self.batches, [])
+        self.assertEqual(str(second), "B")
+        self.assertEqual(str(first), "A")
+        self.assertIsNone(self.loader.get("missing"))
+        self.assertFalse(missing)
+        self.assertEqual(self.batches, [["a", "b", "missing"]])
+
+    def test_values_are_remembered(self):
+        """Загруженные и подставленные значения не выбираются повторно."""
+        self.loader.prime("c", "готово")
+        self.assertEqual(self.loader.get("a"), "A")
+        self.assertEqual(self.loader.get("a"), "A")
+        self.assertEqual(self.loader.get("c"), "готово")
+        self.assertEqual(self.batches, [["a"]])
+
+
+class AuthorsLoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.authors = [User.objects.create_user(username=f"author{number}")
+                       for number in range(3)]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def test_queued_authors_share_one_query(self):
+        """Авторы из очереди выбираются одним запросом со счетчиками."""
+        request = RequestFactory().get("/")
+        request.user = self.reader
+        names = [author.username for author in self.authors]
+        with self.assertNumQueries(1):
+            authors = get_loader(request, "authors").load_many(names)
+            summary = [
+                (author.username, author.stats.posts_count,
+                 author.is_following)
+                for author in authors
+            ]
+        self.assertEqual(summary, [("author0", 0, True),
+                                   ("author1", 0, False),
+                                   ("author2", 0, False)])
+
+    def test_anonymous_user_follows_nobody(self):
+        """Для гостя признак подписки ложный без подзапроса."""
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        author = get_loader(request, "authors").get("author0")
+        self.assertFalse(author.is_following)
+        self.assertIsNone(get_loader(request, "authors").get("nobody"))
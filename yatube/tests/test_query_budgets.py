@@ -0,0 +1,120 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import urls as posts_urls
+from tasks.queue import run_pending
+from posts.models import Comment, Follow, Group, Post, User
+from users import urls as users_urls
+from users.models import Profile
+from yatube.testing import QueryBudgetMixin
+
+
+# Фоновые задачи ставятся в очередь, как в рабочем окружении:
+# бюджет учитывает только работу самого запроса. Записи идут
+# во вложенной транзакции (внутри TestCase это SAVEPOINT и RELEASE).
+@override_settings(TASKS_EAGER=False)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        "index": 3,
+        "follow_index": 4,
+        "group_posts": 4,
+        "search": 5,
+        "new_post": 3,
+        "new_group": 2,
+        "profile": 4,
+        "post": 4,
+        "post_comments": 2,
+        "post_edit": 4,
+        "add_comment": 8,
+        "profile_follow": 11,
+        "profile_unfollow": 10,
+        "signup": 0,
+        "user_edit": 2,
+        "profile_create": 2,
+        "profile_edit": 2,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        Profile.objects.create(user=cls.author, bio="Автор")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        commenters = [
+            User.objects.create_user(username=f"Commenter{number}")
+            for number in range(3)
+        ]
+        for number in range(5):
+            cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                           text=f"Запись {number}")
+            for commenter in commenters:
+                Comment.objects.create(post=cls.post, author=commenter,
+                                       text="Комментарий")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        run_pending()
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def requests(self):
+        author = self.author.username
+        post_args = [author, self.post.id]
+        reader, writer = self.client_reader, self.client_author
+        return {
+            "index": (reader.get, []),
+            "follow_index": (reader.get, []),
+            "group_posts": (reader.get, [self.group.slug]),
+            "search": (reader.get, [], {"q": "запись"}),
+            "new_post": (writer.get, []),
+            "new_group": (writer.get, []),
+            "profile": (reader.get, [author]),
+            "post": (reader.get, post_args),
+            "post_comments": (reader.get, post_args),
+            "post_edit": (writer.get, post_args),
+            "add_comment": (reader.post, post_args, {"text": "Еще"}),
+            "profile_follow": (writer.get, [self.reader.username]),
+            "profile_unfollow": (reader.get, [author]),
+            "signup": (Client().get, []),
+            "user_edit": (reader.get, []),
+            "profile_create": (reader.get, []),
+            "profile_edit": (writer.get, []),
+        }
+
+    def test_every_url_has_budget(self):
+        """Для каждого именованного URL задан бюджет запросов."""
+        names = {
+            pattern.name
+            for urls in (posts_urls, users_urls)
+            for pattern in urls.urlpatterns
+        }
+        self.assertEqual(names, set(self.query_budgets))
+        self.assertEqual(names, set(self.requests()))
+
+    def test_views_stay_within_query_budget(self):
+        """Представления не превышают бюджет и не делают N+1 запросов."""
+        for url_name, (method, args, *data) in self.requests().items():
+            with self.subTest(url_name=url_name):
+                response = self.assertQueryBudget(
+                    url_name,
+                    lambda: method(reverse(url_name, args=args), *data),
+                )
+                self.assertIn(response.status_code, (200, 302))
+
+
+@override_settings(QUERY_COUNT_HEADERS=True)
+class QueryCountMiddlewareTests(TestCase):
+    def test_response_has_query_headers(self):
+        """Ответ сообщает число запросов и время работы с БД."""
+        user = User.objects.create_user(username="Reader")
+        client = Client()
+        client.force_login(user)
+        response = client.get(reverse("index"))
+        self.assertRegex(response["X-DB-Queries"],
+                         r"^count=\d+; duplicates=0$")
+        self.assertTrue(response["Server-Timing"].startswith("db;dur="))
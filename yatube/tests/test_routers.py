@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+
+from posts.models import Post
+from yatube.routers import (ReplicaRouter, ReplicaRoutingMiddleware,
+                            use_replica)
+
+
+@override_settings(DATABASE_REPLICAS=["replica0", "replica1"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self):
+        """Без разрешения чтение идет в основную БД."""
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_allowed_reads_go_to_replica(self):
+        """Разрешенное чтение идет в одну из реплик, запись - в основную."""
+        with use_replica():
+            self.assertIn(self.router.db_for_read(Post),
+                          settings.DATABASE_REPLICAS)
+            self.assertEqual(self.router.db_for_write(Post), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        """Без настроенных реплик все идет в основную БД."""
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_migrations_only_on_primary(self):
+        """Миграции применяются только к основной БД."""
+        self.assertTrue(self.router.allow_migrate("default", "posts"))
+        self.assertFalse(self.router.allow_migrate("replica0", "posts"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica0"])
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def _handle(self, request, response_class=HttpResponse):
+        request.resolver_match = resolve(request.path)
+        used = []
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            used.append(self.router.db_for_read(Post))
+            return response_class("/")
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return used[0], response
+
+    def test_read_only_view_uses_replica(self):
+        """GET-запрос к ленте читает из реплики."""
+        database, _ = self._handle(self.factory.get(reverse("index")))
+        self.assertEqual(database, "replica0")
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_other_views_use_primary(self):
+        """Формы и изменяющие запросы читают из основной БД."""
+        database, _ = self._handle(self.factory.get(reverse("new_post")))
+        self.assertEqual(database, "default")
+        database, _ = self._handle(self.factory.post(reverse("index")))
+        self.assertEqual(database, "default")
+
+    def test_write_pins_browser_to_primary(self):
+        """После записи браузер на время читает из основной БД."""
+        _, response = self._handle(
+            self.factory.post(reverse("new_post")), HttpResponseRedirect
+        )
+        cookie = response.cookies[settings.DATABASE_REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie["max-age"],
+                         settings.DATABASE_REPLICA_PIN_SECONDS)
+        request = self.factory.get(reverse("index"))
+        request.COOKIES[settings.DATABASE_REPLICA_PIN_COOKIE] = cookie.value
+        database, _ = self._handle(request)
+        self.assertEqual(database, "default")
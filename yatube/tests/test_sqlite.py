@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase
+
+
+class SQLiteTuningTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_pragmas_applied_on_connect(self):
+        """Новое подключение получает настройки из SQLITE_PRAGMAS."""
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS["busy_timeout"])
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS["cache_size"])
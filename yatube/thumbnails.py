@@ -0,0 +1,30 @@
+"""
+Подготовка миниатюр изображений вне обработки запроса.
+
+Миниатюры готовят фоновые задачи (tasks.queue), шаблоны берут готовые
+адреса миниатюр из моделей и не обращаются к sorl.thumbnail во время
+отрисовки.
+"""
+from sorl.thumbnail import get_thumbnail
+
+
+def make_thumbnail_url(image, geometry, **options):
+    return get_thumbnail(image, geometry, crop="center", upscale=True,
+                         **options).url
+
+
+def make_srcset(image, geometry, widths, **options):
+    """
+    Возвращает значение srcset из миниатюр указанной ширины
+    с пропорциями geometry ("<ширина>x<высота>").
+    """
+    width, height = (int(size) for size in geometry.split("x"))
+    return ", ".join(
+        "{} {}w".format(
+            make_thumbnail_url(
+                image, f"{size}x{round(height * size / width)}", **options
+            ),
+            size,
+        )
+        for size in widths
+    )
@@ -14,6 +14,8 @@ urlpatterns = [
     path("auth/", include("django.contrib.auth.urls")),
     path("admin/", admin.site.urls),
     path("about/", include("about.urls", namespace="about")),
+    path("api/v1/", include("api.urls", namespace="api")),
+    path("events/", include("events.urls", namespace="events")),
     path("", include("posts.urls")),
 ]
 